@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import tracemalloc
+
+from studentlink import StudentLinkAuth
+from studentlink.fake import FakeServer, LocalSession
+from studentlink.modules.bldg import Bldg
+from studentlink.modules.browse_schedule import BrowseSchedule
+from studentlink.modules.reg import Add
+from studentlink.util import Semester
+
+SEMESTER = Semester.from_str("spring 2024")
+# the fake server shares the process; what it allocates isn't the client's
+FILTERS = [
+    tracemalloc.Filter(False, "*/studentlink/fake/*"),
+    tracemalloc.Filter(False, "*/aiohttp/web*"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+]
+
+
+async def poll_round(sl: StudentLinkAuth, specs: int, limit: int = None):
+    # what a bot holding a catalog does every round: walk every browse page
+    # of the semester, look up the buildings, and log per abbreviation.
+    # limit stops the walk after the page that reaches that many sections
+    colleges = await sl.module(Add).get_college_codes(SEMESTER)
+    catalog, query = [], [colleges[0]]
+    while query and (limit is None or len(catalog) < limit):
+        views, query = await sl.module(BrowseSchedule).search_class(
+            SEMESTER, *query, include_next_query=True
+        )
+        catalog += views
+    await sl.module(Bldg).get_buildings(
+        e.building.abbreviation for v in catalog for e in v.schedule if e.building
+    )
+    for view in catalog[:specs]:
+        logging.getLogger(view.abbr)  # like bot.disc_log
+    return catalog
+
+
+def measure() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(FILTERS)
+
+
+def total(snapshot: tracemalloc.Snapshot) -> int:
+    return sum(s.size for s in snapshot.statistics("filename"))
+
+
+def print_sites(title: str, new: tracemalloc.Snapshot, old: tracemalloc.Snapshot, top: int):
+    print(title)
+    for stat in new.compare_to(old, "lineno")[:top]:
+        frame = stat.traceback[0]
+        print(
+            f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+8d} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+
+
+async def amain(args) -> list[str]:
+    tracemalloc.start(args.frames)
+    accounts = {"memory": "memory"}
+    async with FakeServer(
+        accounts,
+        sections=args.sections,
+        events=args.events,
+        page_size=args.page_size,
+        churn=args.churn,
+    ) as server:
+        async with LocalSession(server.url) as session:
+            async with StudentLinkAuth(
+                "memory", "memory", session=session, keepalive_interval=0
+            ) as sl:
+                await sl.module(Add).get_college_codes(SEMESTER)  # logs in
+                empty = measure()
+                # a round over half the catalog first: what both rounds hold
+                # beyond their sections (loggers, buildings, connections and
+                # so on) is the same, so the difference is per section
+                half = await poll_round(sl, args.specs, args.sections // 2)
+                held_half, sections_half = measure(), len(half)
+                del half
+                catalog = await poll_round(sl, args.specs)
+                held = measure()
+                growth = []
+                for _ in range(args.rounds):
+                    before = total(measure())
+                    catalog = await poll_round(sl, args.specs)
+                    growth.append(total(measure()) - before)
+                last = measure()
+
+    per_section = (total(held) - total(held_half)) / (len(catalog) - sections_half)
+    fixed = total(held) - total(empty) - per_section * len(catalog)
+    per_round = sum(growth) / len(growth) if growth else 0
+    print(
+        f"{len(catalog)} sections x {args.events} events, {args.rounds} rounds "
+        f"after the first"
+    )
+    print(f"held after the first round  {per_section:8.0f} bytes/section")
+    print(f"  plus a fixed              {fixed / 1024:8.0f} KiB")
+    print(
+        f"retained growth per round   {per_round:8.0f} bytes "
+        f"({', '.join(f'{g:+d}' for g in growth)})"
+    )
+    print_sites("top sites held after the first round:", held, empty, args.top)
+    print_sites("top sites of growth since the first round:", last, held, args.top)
+
+    failures = []
+    if per_section > args.budget_section:
+        failures.append(
+            f"{per_section:.0f} bytes/section over the budget of {args.budget_section}"
+        )
+    if per_round > args.budget_growth:
+        failures.append(
+            f"{per_round:.0f} bytes/round of growth over the budget of {args.budget_growth}"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="memory held by a polling client, with budgets"
+    )
+    parser.add_argument("--sections", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=2)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--specs", type=int, default=200)
+    parser.add_argument("--churn", type=float, default=50, help="seat changes per second")
+    parser.add_argument("--frames", type=int, default=1)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-section", type=int, default=2048)
+    parser.add_argument("--budget-growth", type=int, default=64 * 1024)
+    args = parser.parse_args()
+    if failures := asyncio.run(amain(args)):
+        print("over budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from studentlink.fake import make_catalog, pages
+from studentlink.util import PageParseError, Semester
+from studentlink.modules.allsched import AllSched
+from studentlink.modules.browse_schedule import BrowseSchedule
+from studentlink.modules.regsched import RegSched
+from studentlink.modules.reg import Drop, Plan, Section
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "parsers.json")
+SEMESTER = Semester.from_str("spring 2024")
+SEMESTERS = [Semester.from_str(s) for s in ("spring 2024", "fall 2023", "spring 2023", "fall 2022")]
+
+
+def spread(sections):
+    # schedule pages list several semesters
+    chunk = -(-len(sections) // len(SEMESTERS))
+    return {s: sections[i * chunk : (i + 1) * chunk] for i, s in enumerate(SEMESTERS)}
+
+
+PARSERS = {
+    "browse": (BrowseSchedule._parse_class_list, pages.browse_page),
+    "drop": (Drop._parse_drop_list, pages.drop_page),
+    "plan": (Plan._parse_planner, lambda s: pages.plan_page(SEMESTER, s)),
+    "section": (Section._parse_section_change, lambda s: pages.section_page(SEMESTER, s)),
+    "regsched": (RegSched._parse_schedule, lambda s: pages.regsched_page(spread(s))),
+    "allsched": (AllSched._parse_schedule, lambda s: pages.allsched_page(spread(s))),
+}
+
+
+def parse(page, parse_function, backend):
+    # straight to the backend, without parse_page's fallback to html5lib
+    return parse_function(BeautifulSoup(page, backend), page)
+
+
+def time_parse(page, parse_function, backend, min_time, repeat):
+    # best of a few runs, as many as fit in min_time
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < repeat and (runs == 0 or spent < min_time):
+        gc.collect()
+        start = time.perf_counter()
+        parse(page, parse_function, backend)
+        elapsed = time.perf_counter() - start
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best
+
+
+def trace_parse(page, parse_function, backend):
+    # peak memory of a parse, and the blocks it has allocated that are still
+    # alive once it's done (the tree and the views, not temporaries)
+    gc.collect()
+    tracemalloc.start()
+    soup = BeautifulSoup(page, backend)
+    result = parse_function(soup, page)
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup, result
+    return peak, blocks
+
+
+def run(args):
+    results = {}
+    for rows in args.rows:
+        sections = make_catalog(rows, args.events)
+        for name in args.parsers:
+            parse_function, render = PARSERS[name]
+            page = render(sections)
+            for backend in args.backends:
+                key = f"{name}/{backend}/{rows}x{args.events}"
+                try:
+                    elapsed = time_parse(page, parse_function, backend, args.min_time, args.repeat)
+                except PageParseError:
+                    print(f"{key:<32} fails to parse")
+                    continue
+                peak, blocks = trace_parse(page, parse_function, backend)
+                results[key] = {
+                    "rows_per_second": rows / elapsed,
+                    "peak_bytes": peak,
+                    "blocks": blocks,
+                }
+                print(
+                    f"{key:<32} {rows / elapsed:10.0f} rows/s  "
+                    f"{elapsed * 1e3:9.1f} ms  "
+                    f"peak {peak / 2**20:7.2f} MiB  "
+                    f"{blocks / rows:7.0f} blocks/row"
+                )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # slower, or using more memory, than the baseline by more than tolerance
+    regressions = []
+    for key, result in results.items():
+        if (base := baseline.get(key)) is None:
+            continue
+        if result["rows_per_second"] < base["rows_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: {result['rows_per_second']:.0f} rows/s, "
+                f"baseline {base['rows_per_second']:.0f}"
+            )
+        for metric in ("peak_bytes", "blocks"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{key}: {metric} {result[metric]}, baseline {base[metric]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="parse speed and memory of the page parsers on synthetic pages"
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--events", type=int, default=2)
+    parser.add_argument("--parsers", nargs="+", choices=PARSERS, default=list(PARSERS))
+    parser.add_argument("--backends", nargs="+", default=["lxml", "html5lib"])
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="record these results as the baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args)
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline | results, f, indent=1, sort_keys=True)
+        print(f"saved {len(results)} results to {args.baseline}")
+        return
+    if regressions := compare(results, baseline, args.tolerance):
+        print("regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    if baseline:
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
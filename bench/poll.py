@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import collections
+import importlib
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from aiohttp import ClientSession, web
+
+from studentlink import StudentLinkAuth
+from studentlink.fake import FakeServer, LocalSession
+from studentlink.ratelimit import RateLimits
+from studentlink.scheduler import Scheduler
+
+USERNAME, PASSWORD = "loadtest", "loadtest"
+
+
+class ServerThread(threading.Thread):
+    # the fake server and a stand-in discord webhook get a thread and event
+    # loop of their own, so the CPU time of the main thread is the bot's alone
+    def __init__(self, server: FakeServer):
+        super().__init__(daemon=True)
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.messages = collections.Counter()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.setup())
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.teardown())
+
+    async def setup(self):
+        await self.server.start()
+        app = web.Application()
+        app.router.add_post("/discord", self.discord)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.discord_url = f"http://127.0.0.1:{port}/discord"
+
+    async def teardown(self):
+        await self.runner.cleanup()
+        await self.server.stop()
+
+    async def discord(self, request: web.Request):
+        self.messages[(await request.post()).get("username")] += 1
+        return web.Response(status=204)
+
+    async def call(self, function, *args):
+        # runs function on the server's loop, between its requests
+        async def run():
+            return function(*args)
+
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(run(), self.loop)
+        )
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+
+def import_bot(directory: str, discord_url: str):
+    # bot reads its settings from the environment and spec.json from the
+    # working directory when it's imported
+    os.environ.update(USERNAME=USERNAME, PASSWORD=PASSWORD, DISC_URL=discord_url)
+    os.chdir(directory)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    bot = importlib.import_module("bot")
+    logging.getLogger().setLevel(logging.WARNING)
+    return bot
+
+
+async def open_seats(
+    thread: ServerThread, semester, sections, every: float, openings: list
+):
+    # a seat opens in one of the full spec sections every so often
+    rng = random.Random(1)
+    while True:
+        await asyncio.sleep(every)
+        full = [s for s in sections if s.open_seats <= 0 and s not in openings]
+        if full:
+            section = rng.choice(full)
+            await thread.call(thread.server.set_seats, semester, section.reg_id, 1)
+            openings.append(section)
+
+
+def rearm(server: FakeServer, semester, openings: list):
+    # drops whatever the bot registered for and fills the section again, so
+    # every spec is polled in every round
+    registered = server.registered[USERNAME][semester]
+    for section in registered:
+        server.update_seats(section, 0)
+        openings.remove(section)
+    registered.clear()
+
+
+def percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return f"p50 {q[49] * 1e3:7.1f}ms  p99 {q[98] * 1e3:7.1f}ms  max {max(values) * 1e3:7.1f}ms"
+
+
+async def amain(args):
+    server = FakeServer(
+        {USERNAME: PASSWORD},
+        sections=args.sections,
+        page_size=args.page_size,
+        latency=args.latency,
+        throttle=args.throttle,
+    )
+    thread = ServerThread(server)
+    thread.start()
+    thread.ready.wait()
+    directory = tempfile.mkdtemp()
+    bot = import_bot(directory, thread.discord_url)
+    semester = bot.SEMESTER
+    # every spec is a full section until the opener gets to it
+    sections = random.Random(0).sample(server.catalog(semester).sections, args.specs)
+    for section in sections:
+        server.update_seats(section, 0)
+    with open(os.path.join(directory, "spec.json"), "w") as f:
+        json.dump([{"add": s.abbr} for s in sections], f)
+
+    openings = []
+    rounds, cpu = [], []
+    async with LocalSession(server.url) as session, ClientSession() as discord:
+        sl = StudentLinkAuth(
+            USERNAME,
+            PASSWORD,
+            session=session,
+            rate_limits=RateLimits(rate=args.rate) if args.rate else None,
+            scheduler=Scheduler(args.slots) if args.slots else None,
+        )
+        async with sl:
+            spec = await bot.refresh_spec(sl, [])
+            requests = collections.Counter(server.stats.requests)
+            opener = asyncio.create_task(
+                open_seats(thread, semester, sections, args.open_every, openings)
+            )
+            for _ in range(args.rounds):
+                spec = await bot.refresh_spec(sl, spec)
+                start, start_cpu = time.perf_counter(), time.thread_time()
+                await bot.poll_round(sl, spec, discord)
+                rounds.append(time.perf_counter() - start)
+                cpu.append(time.thread_time() - start_cpu)
+                await thread.call(rearm, server, semester, openings)
+                await asyncio.sleep(args.pause)
+            opener.cancel()
+    thread.shutdown()
+
+    stats = server.stats
+    print(f"{args.specs} specs, {args.rounds} rounds, {args.latency * 1e3:.0f}ms latency")
+    print(f"round duration    {percentiles(rounds)}")
+    print(f"cpu per round     {percentiles(cpu)}")
+    print(
+        f"seat open→confirm {percentiles(stats.grabs)}  "
+        f"({len(stats.grabs)} grabbed, {len(openings)} still open)"
+    )
+    print("requests per round:")
+    for module, count in sorted((stats.requests - requests).items()):
+        print(f"  {module:<32} {count / args.rounds:8.1f}")
+    print(
+        f"refused {stats.refused}, logins {stats.logins}, "
+        f"discord posts {sum(thread.messages.values())}, "
+        f"limiter {sl.rate_limits['https://www.bu.edu/'].stats}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="bot.poll_round against a local fake studentlink"
+    )
+    parser.add_argument("--specs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sections", type=int, default=4000)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--throttle", type=float, default=None)
+    parser.add_argument("--open-every", type=float, default=0.5)
+    parser.add_argument("--pause", type=float, default=1)
+    parser.add_argument("--rate", type=float, default=None, help="initial request rate")
+    parser.add_argument("--slots", type=int, default=None, help="scheduler slots")
+    asyncio.run(amain(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+from studentlink import StudentLink
+
+PAGE = "<HTML><BODY>" + "x" * 20000 + "</BODY></HTML>"
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+async def start_server(cert: str, key: str, latency: float):
+    # every new connection shows up as a new client port
+    ports = set()
+
+    async def handle(request: web.Request):
+        ports.add(request.transport.get_extra_info("peername")[1])
+        await asyncio.sleep(latency)
+        return web.Response(text=PAGE, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"https://127.0.0.1:{port}/", ports
+
+
+async def poll(session: aiohttp.ClientSession, url: str, args) -> list[float]:
+    async def get(i):
+        start = time.perf_counter()
+        async with session.get(url, params={"i": i}) as r:
+            await r.read()
+        return time.perf_counter() - start
+
+    latencies = []
+    for _ in range(args.rounds):
+        latencies += await asyncio.gather(*(get(i) for i in range(args.concurrency)))
+        await asyncio.sleep(args.pause)
+    return latencies
+
+
+async def run(name: str, make_client, warm_up: int, url: str, ports: set, args):
+    ports.clear()
+    client = make_client()
+    async with client:
+        start = time.perf_counter()
+        if warm_up:
+            # what warm_up= does on __aenter__, aimed at the local server
+            await client.warm_connections(warm_up, urls=(url,))
+        warmed = len(ports)
+        session = client.session if isinstance(client, StudentLink) else client
+        latencies = await poll(session, url, args)
+        elapsed = time.perf_counter() - start
+    first = latencies[: args.concurrency]
+    print(
+        f"{name:<28} {elapsed:6.2f}s  "
+        f"first round p50 {statistics.median(first) * 1e3:6.1f}ms  "
+        f"overall p50 {statistics.median(latencies) * 1e3:6.1f}ms "
+        f"p95 {statistics.quantiles(latencies, n=20)[-1] * 1e3:6.1f}ms  "
+        f"{len(ports) - warmed} connections opened by requests"
+    )
+
+
+async def amain(args):
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        # trust the self-signed certificate in every session's default context
+        os.environ["SSL_CERT_FILE"] = cert
+        runner, url, ports = await start_server(cert, key, args.latency)
+        try:
+            configs = {
+                "no keep-alive": (
+                    lambda: aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(force_close=True)
+                    ),
+                    0,
+                ),
+                "aiohttp defaults": (aiohttp.ClientSession, 0),
+                "StudentLink pool": (StudentLink, 0),
+                "StudentLink pool + warm-up": (StudentLink, args.concurrency),
+            }
+            for name, (make_client, warm_up) in configs.items():
+                await run(name, make_client, warm_up, url, ports, args)
+        finally:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="request latency over TLS with different connection pools"
+    )
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pause", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    asyncio.run(amain(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import time
+
+from studentlink.util import Abbr
+from studentlink.data.class_ import Event, Building, Weekday
+from studentlink.modules.browse_schedule import RegClassView
+
+BUILDINGS = ["CAS", "PHO", "SCI", "EPC", "KCB", "STO", "WED", "COM", "GCB", "LAW"]
+
+
+def build_catalog(sections: int, events: int, seed: int = 0) -> list[RegClassView]:
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(sections):
+        schedule = tuple(
+            Event.of(
+                Weekday(rng.randint(1, 5)),
+                time(rng.randint(8, 18), rng.choice((0, 30))),
+                time(rng.randint(8, 18), rng.choice((15, 45))),
+                Building.of(rng.choice(BUILDINGS)),
+                str(rng.randint(100, 400)),
+            )
+            for _ in range(events)
+        )
+        catalog.append(
+            RegClassView(
+                abbr=Abbr(f"CAS CS{100 + i % 900} {'ABC'[i // 900 % 3]}{1 + i // 2700 % 9}"),
+                title=f"Title {i}",
+                instructor=f"Instructor {i}",
+                cr_hrs="4.0",
+                type="Lec",
+                schedule=schedule,
+                reg_id=f"{i:010d}",
+                open_seats=i % 30,
+            )
+        )
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory held per RegClassView")
+    parser.add_argument("--sections", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=3)
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    catalog = build_catalog(args.sections, args.events)
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{len(catalog)} sections x {args.events} events: "
+        f"{(after - before) / len(catalog):.0f} bytes/section held, "
+        f"{(peak - before) / 2**20:.1f} MiB peak"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ from io import StringIO
 import json
 import sys
 
-from aiohttp import ClientSession, CookieJar
+from aiohttp import ClientSession
 
 from studentlink import StudentLinkAuth, LoginError, ConnectionError, InternalError
 from studentlink.util import Semester, Abbr
@@ -239,21 +239,64 @@ async def refresh_spec(
         return spec
 
 
-async def poll():
-    delay_stop = False
-    cookie_jar = CookieJar()
+async def poll_round(
+    sl: StudentLinkAuth,
+    spec: list[dict[str, str]],
+    session: ClientSession,
+    logger: logging.Logger = logging.getLogger(),
+):
+    """one pass over the spec: registers for or replaces every class in it
+    that isn't on the schedule yet."""
+    reg_open = await sl.module(Add).check_reg_open(SEMESTER)
+    if not reg_open:
+        logger.warning("Registration not open")
+        return
+    try:
+        res = await sl.module(Drop).get_drop_list(SEMESTER)
+        schedule = [cv.abbr for cv in res]
+    except UnavailableOptionError:
+        # logger.warning("Registration not open")
+        schedule = []
+    tasks = [
+        attempt_replace(
+            sl,
+            add=Abbr(s["add"]),
+            replace=Abbr(s["replace"]),
+            unsafe=s.get("unsafe", False),
+        )
+        if "replace" in s and s["replace"] in schedule
+        else attempt_register(sl, Abbr(s["add"]))
+        for s in spec
+        if s.get("add") not in schedule
+    ]
     try:
-        cookie_jar.load("cookies.pickle")
-    except FileNotFoundError:
+        await asyncio.gather(*tasks)
+    except AttributeError as e:
+        logger.warning(e)
+    except InternalError as e:
+        logger.warning(e)
+    except UnavailableOptionError as e:
+        logger.warning("Registration not open but still tried somehow")
+    except RegisterFail as e:
         pass
-    session = ClientSession(cookie_jar=cookie_jar)
+        # async with disc_log(session, "Register Fail") as logger:
+        #     logger.warning(e)
+    except CriticalError as e:
+        async with disc_log(session, "Critical Error") as logger:
+            logger.critical(e)
+
+
+async def poll():
+    delay_stop = False
+    # for discord only, studentlink keeps its own session and cookies
+    session = ClientSession()
     logger = logging.getLogger()
     try:
         async with StudentLinkAuth(
             USERNAME,
             PASSWORD,
-            session=session,
             logger=logger,
+            cookie_path="cookies.pickle",
         ) as sl:
             spec = await refresh_spec(sl, [])
             async with disc_log(session, "Start") as logger:
@@ -261,44 +304,7 @@ async def poll():
             while True:
                 spec = await refresh_spec(sl, spec)
 
-                reg_open = await sl.module(Add).check_reg_open(SEMESTER)
-                if not reg_open:
-                    logger.warning("Registration not open")
-                    await asyncio.sleep(5)
-                    continue
-                try:
-                    res = await sl.module(Drop).get_drop_list(SEMESTER)
-                    schedule = [cv.abbr for cv in res]
-                except UnavailableOptionError:
-                    # logger.warning("Registration not open")
-                    schedule = []
-                tasks = [
-                    attempt_replace(
-                        sl,
-                        add=Abbr(s["add"]),
-                        replace=Abbr(s["replace"]),
-                        unsafe=s.get("unsafe", False),
-                    )
-                    if "replace" in s and s["replace"] in schedule
-                    else attempt_register(sl, Abbr(s["add"]))
-                    for s in spec
-                    if s.get("add") not in schedule
-                ]
-                try:
-                    await asyncio.gather(*tasks)
-                except AttributeError as e:
-                    logger.warning(e)
-                except InternalError as e:
-                    logger.warning(e)
-                except UnavailableOptionError as e:
-                    logger.warning("Registration not open but still tried somehow")
-                except RegisterFail as e:
-                    pass
-                    # async with disc_log(session, "Register Fail") as logger:
-                    #     logger.warning(e)
-                except CriticalError as e:
-                    async with disc_log(session, "Critical Error") as logger:
-                        logger.critical(e)
+                await poll_round(sl, spec, session, logger)
                 await asyncio.sleep(5)
     except LoginError as e:
         async with disc_log(session, "Login Error") as logger:
@@ -311,13 +317,11 @@ async def poll():
         if delay_stop:
             async with disc_log(session, "Connection Error") as logger:
                 logger.error("Connection error, waiting 10 minutes before retrying")
-            cookie_jar.save("cookies.pickle")
             await session.close()
             await asyncio.sleep(600)
         else:
             async with disc_log(session, "Stopped") as logger:
                 logger.info("Stopped")
-            cookie_jar.save("cookies.pickle")
             await session.close()
 
 
@@ -1,15 +1,48 @@
 from __future__ import annotations
-from typing import Callable, TypeVar
+from typing import TYPE_CHECKING, Awaitable, Callable, Hashable, TypeVar
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from bs4 import BeautifulSoup
 import aiohttp
+import asyncio
+import contextlib
+import functools
 import logging
 import html
 import re
+import time
 from yarl import URL
+import charset_normalizer
+import codecs
 
 from .modules._module import Module, PublicModule
+from .parser import FAST_PARSER, ParseCache, copy_result, parse_page, page_digest
+from .cache import SQLiteCache
+from .cookies import PersistentCookieJar
+from .ratelimit import RateLimits
+from .scheduler import DISPATCHED, PRIORITY, Priority, Scheduler
+
+if TYPE_CHECKING:
+    from .fake.record import Recorder
 
 M = TypeVar("M", bound=Module)
 PM = TypeVar("PM", bound=PublicModule)
+T = TypeVar("T")
+
+EXECUTORS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+LOGIN_PAGE = "<title>Boston University | Login</title>"
+STALE_REQUEST = "Web Login Service - Stale Request"
+REFUSED = "not available: Connection refused"
+ERROR_PAGE = "<title>Error &middot; Boston University</title>"
+# shib's page that posts the SAML response back to studentlink
+SAML_CONTINUE = "you must press the Continue button once to proceed."
+# all of the above sit in the title or in a short error page, so only this
+# much of a response is searched for them
+SENTINEL_CHARS = 4096
+# responses are dropped as soon as one of these turns up; the error page is
+# read in full since it ends up in the InternalError
+ABORT_ON = tuple(s.encode() for s in (LOGIN_PAGE, STALE_REQUEST, REFUSED))
 
 
 class LoginError(Exception):
@@ -25,25 +58,148 @@ class InternalError(Exception):
 
 
 class StudentLink:
+    # studentlink itself and the login server
+    WARM_UP_URLS = ("https://www.bu.edu/", "https://shib.bu.edu/")
+
     def __init__(
-        self, session: aiohttp.ClientSession = None, logger: logging.Logger = None
+        self,
+        session: aiohttp.ClientSession = None,
+        logger: logging.Logger = None,
+        parser: str = FAST_PARSER,
+        executor: str | Executor = None,
+        executor_workers: int = None,
+        parse_cache_size: int = 128,
+        persistent_cache: str | SQLiteCache = None,
+        rate_limits: RateLimits = None,
+        refusal_retries: int = 3,
+        scheduler: Scheduler = None,
+        pool_size: int = 32,
+        pool_size_per_host: int = 16,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: int = 300,
+        warm_up: int = 0,
+        cookie_jar: aiohttp.abc.AbstractCookieJar = None,
+        recorder: Recorder = None,
     ):
+        # the pool settings and cookie jar only apply to a session created here
         self.session, self.owns_session = (
-            (session, False) if session else (aiohttp.ClientSession(), True)
+            (session, False)
+            if session
+            else (
+                aiohttp.ClientSession(
+                    cookie_jar=cookie_jar,
+                    connector=aiohttp.TCPConnector(
+                        limit=pool_size,
+                        limit_per_host=pool_size_per_host,
+                        keepalive_timeout=keepalive_timeout,
+                        ttl_dns_cache=dns_cache_ttl,
+                    )
+                ),
+                True,
+            )
         )
+        # connections per host to open on __aenter__
+        self.warm_up = warm_up
         self.logger = logger or logging.getLogger(__name__)
+        self.parser = parser
+        # parsing runs on the event loop unless an executor is given; "process"
+        # scales across cores, "thread" only keeps the loop responsive
+        self.executor, self.owns_executor = (
+            (EXECUTORS[executor](executor_workers), True)
+            if isinstance(executor, str)
+            else (executor, False)
+        )
+        self.parse_cache = ParseCache(parse_cache_size)
+        self.parsing: dict[tuple[Hashable, bytes], asyncio.Task] = {}
+        self.fetching: dict[Hashable, asyncio.Task[str]] = {}
+        # detected encoding per host, for responses that don't declare one
+        self.encodings: dict[str, str] = {}
+        # slow-changing lookups like buildings survive restarts in here
+        self.persistent_cache, self.owns_persistent_cache = (
+            (SQLiteCache(persistent_cache), True)
+            if isinstance(persistent_cache, str)
+            else (persistent_cache, False)
+        )
+        # paces requests per host once it refuses one, and retries those
+        self.rate_limits = rate_limits or RateLimits()
+        self.refusal_retries = refusal_retries
+        # concurrency limit with slots reserved for higher priority lanes
+        self.scheduler = scheduler or Scheduler()
         self.modules: dict[type, Module] = {}
+        # bumped on every login, which resets server-side session state
+        self.login_generation = 0
+        self.last_request = time.monotonic()
+        # keeps a scrubbed copy of every page for studentlink.fake to replay
+        self.recorder = recorder
 
     async def __aenter__(self):
         if self.owns_session:
             await self.session.__aenter__()
+        if self.warm_up:
+            await self.warm_connections(self.warm_up)
         return self
 
     async def __aexit__(self, *args):
         if self.owns_session:
             await self.session.__aexit__(*args)
+        if self.owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.owns_persistent_cache:
+            self.persistent_cache.close()
         self.session = None
 
+    async def warm_connections(self, connections: int = 1, urls=WARM_UP_URLS):
+        # opens pooled connections ahead of time so that the first requests
+        # don't pay for the TCP and TLS handshakes
+        async def touch(url):
+            try:
+                async with self.session.head(url, allow_redirects=False) as r:
+                    await r.read()
+            except aiohttp.ClientError as e:
+                self.logger.warning(f"couldn't warm up {url}: {e}")
+
+        await asyncio.gather(*(touch(url) for url in urls for _ in range(connections)))
+
+    async def parse(
+        self,
+        page: str,
+        parse: Callable[[BeautifulSoup, str], T],
+        *,
+        key: Hashable = None,
+        region: str = None,
+    ) -> T:
+        if key is None:
+            return await self.run_parser(page, parse)
+        key = (parse, key)
+        digest = page_digest(page, region)
+        if (result := self.parse_cache.get(key, digest)) is not None:
+            return result
+        if self.executor is None:  # nothing can interleave with the parse
+            result = parse_page(page, parse, self.parser)
+            self.parse_cache.put(key, digest, result)
+            return result
+        # share one executor job between concurrent parses of the same page
+        if (task := self.parsing.get((key, digest))) is None:
+            task = self.parsing[key, digest] = asyncio.create_task(
+                self.run_parser(page, parse)
+            )
+            task.add_done_callback(
+                functools.partial(self.finish_parse, key, digest)
+            )
+        return copy_result(await asyncio.shield(task))
+
+    async def run_parser(self, page: str, parse: Callable[[BeautifulSoup, str], T]):
+        if self.executor is None:
+            return parse_page(page, parse, self.parser)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, parse_page, page, parse, self.parser
+        )
+
+    def finish_parse(self, key: Hashable, digest: bytes, task: asyncio.Task):
+        del self.parsing[key, digest]
+        if not task.cancelled() and task.exception() is None:
+            self.parse_cache.put(key, digest, task.result())
+
     def module(self, module: Callable[[], PM]) -> PM:
         if not issubclass(module, PublicModule):
             raise TypeError(
@@ -53,21 +209,140 @@ class StudentLink:
             self.modules[module] = module(self)
         return self.modules[module]
 
-    async def get_page(self, url, *, params: dict[str, str] = None) -> str:
-        r = await self.session.get(url, params=params)
-        t = await r.text()
-        if "<title>Boston University | Login</title>" in t:
+    async def get_page(
+        self,
+        url,
+        *,
+        params: dict[str, str] = None,
+        coalesce: bool = True,
+        priority: Priority = None,
+        after_login: Callable[[], Awaitable] = None,
+    ) -> str:
+        # identical GETs already in flight in the same lane share one
+        # request, so nobody inherits the queue position of a lower lane;
+        # pass coalesce=False for requests with side effects. without a
+        # priority the lane comes from the scheduler.priority() context.
+        # after_login restores server-side state a re-login dropped before
+        # the request is sent again
+        if priority is None:
+            priority = PRIORITY.get()
+        if not coalesce:
+            return await self.fetch_page(
+                url, params=params, priority=priority, after_login=after_login
+            )
+        key = (
+            str(url),
+            tuple((k, str(v)) for k, v in (params or {}).items()),
+            priority,
+        )
+        if (task := self.fetching.get(key)) is None:
+            task = self.fetching[key] = asyncio.create_task(
+                self.fetch_page(
+                    url, params=params, priority=priority, after_login=after_login
+                )
+            )
+            task.add_done_callback(functools.partial(self.fetching.pop, key))
+        return await asyncio.shield(task)
+
+    async def fetch_page(
+        self,
+        url,
+        *,
+        params: dict[str, str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        after_login: Callable[[], Awaitable] = None,
+    ) -> str:
+        r, t = await self.request(url, params=params, priority=priority)
+        if LOGIN_PAGE in t[:SENTINEL_CHARS]:
             raise TypeError(
                 f"This page requires authentication; use StudentLinkAuth instead"
             )
-        if "not available: Connection refused" in t:
-            raise ConnectionError("Connection refused")
-        if "<title>Error &middot; Boston University</title>" in t:
-            raise InternalError(f"{r.url}\n{t}")
         return t
 
+    async def request(
+        self,
+        url,
+        *,
+        params: dict[str, str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> tuple[aiohttp.ClientResponse, str]:
+        limiter = self.rate_limits[url]
+        for _ in range(self.refusal_retries + 1):
+            async with self.scheduler.slot(priority):
+                sent_at = await limiter.acquire(priority)
+                if (dispatched := DISPATCHED.get()) is not None and not dispatched.done():
+                    dispatched.set_result(None)
+                r = await self.session.get(url, params=params)
+                t = await self.read_page(r)
+            head = t[:SENTINEL_CHARS]
+            if REFUSED in head:
+                # the server refused before doing anything, so it's safe to
+                # resend once the limiter has backed off
+                limiter.refused(sent_at)
+                continue
+            if ERROR_PAGE in head:
+                limiter.refused(sent_at)
+                raise InternalError(f"{r.url}\n{t}")
+            limiter.succeeded()
+            self.last_request = time.monotonic()
+            if self.recorder is not None:
+                self.recorder.record(r.url, t)
+            return r, t
+        raise ConnectionError("Connection refused")
+
+    async def read_page(self, r: aiohttp.ClientResponse) -> str:
+        # streams the body and stops early at a login redirect or refusal,
+        # which are all the caller needs to know about those pages
+        chunks = []
+        size = 0
+        async for chunk in r.content.iter_any():
+            chunks.append(chunk)
+            if size < SENTINEL_CHARS <= size + len(chunk):
+                head = b"".join(chunks)[:SENTINEL_CHARS]
+                if any(sentinel in head for sentinel in ABORT_ON):
+                    r.close()
+                    return head.decode(self.encoding(r, head), errors="replace")
+            size += len(chunk)
+        return self.decode(r, b"".join(chunks))
+
+    def encoding(self, r: aiohttp.ClientResponse, body: bytes) -> str:
+        # r.text() would run charset detection over every undeclared body
+        if r.charset:
+            try:
+                return codecs.lookup(r.charset).name
+            except LookupError:
+                pass
+        if (encoding := self.encodings.get(r.url.host)) is None:
+            encoding = self.encodings[r.url.host] = (
+                charset_normalizer.detect(body)["encoding"] or "utf-8"
+            )
+        return encoding
+
+    def decode(self, r: aiohttp.ClientResponse, body: bytes) -> str:
+        try:
+            return body.decode(self.encoding(r, body))
+        except UnicodeDecodeError:  # the host switched encodings, detect again
+            self.encodings.pop(r.url.host, None)
+            return body.decode(self.encoding(r, body), errors="replace")
+
+
+@dataclass
+class LoginStats:
+    logins: int = 0
+    failures: int = 0
+    # logins that skipped the duo push because duo remembered the device
+    remembered: int = 0
+    # requests that waited for a login started by another request
+    parked: int = 0
+    # requests that hit the login page but were simply resent because a
+    # login finished while they were in flight
+    replayed: int = 0
+
 
 class StudentLinkAuth(StudentLink):
+    # a cheap page that needs a login, touched to keep the session alive
+    KEEPALIVE_MODULE = "regsched.pl"
+
     def __init__(
         self,
         username: str,
@@ -75,38 +350,122 @@ class StudentLinkAuth(StudentLink):
         session: aiohttp.ClientSession = None,
         logger: logging.Logger = None,
         login_retries: int = 3,
+        cookie_path: str = None,
+        keepalive_interval: float = 60 * 10,
+        **kwargs,
     ):
-        super().__init__(session, logger)
+        if cookie_path is not None:
+            if session is not None:
+                raise ValueError("cookie_path only applies to a session created here")
+            kwargs["cookie_jar"] = PersistentCookieJar(cookie_path)
+        super().__init__(session, logger, **kwargs)
         self.username = username
         self.password = password
         self.login_retries = login_retries
+        self.login_task: asyncio.Task = None
+        self.login_stats = LoginStats()
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_task: asyncio.Task = None
+
+    async def __aenter__(self):
+        await super().__aenter__()
+        if self.keepalive_interval:
+            self.keepalive_task = asyncio.create_task(self.keep_alive())
+        return self
+
+    async def __aexit__(self, *args):
+        if self.keepalive_task is not None:
+            self.keepalive_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.keepalive_task
+            self.keepalive_task = None
+        await super().__aexit__(*args)
 
-    async def get_page(self, url, *, params: dict[str, str] = None) -> str:
+    async def keep_alive(self):
+        # touches a page whenever the session has been idle for a while, so
+        # that an expired session is found (and logged back into) here rather
+        # than by the next real request
+        while True:
+            idle = time.monotonic() - self.last_request
+            if idle < self.keepalive_interval:
+                await asyncio.sleep(self.keepalive_interval - idle)
+                continue
+            try:
+                await self.get_page(
+                    Module.mod_url(self.KEEPALIVE_MODULE), priority=Priority.BACKGROUND
+                )
+            except Exception as e:
+                self.logger.warning(f"keepalive failed: {e!r}")
+                self.last_request = time.monotonic()  # wait another interval
+
+    async def fetch_page(
+        self,
+        url,
+        *,
+        params: dict[str, str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        after_login: Callable[[], Awaitable] = None,
+    ) -> str:
         login_errors = []
         for _ in range(self.login_retries):
-            r = await self.session.get(url, params=params)
-            t = await r.text()
-            if "not available: Connection refused" in t:
-                raise ConnectionError("Connection refused")
-            if "<title>Error &middot; Boston University</title>" in t:
-                raise InternalError(f"{r.url}\n{t}")
-            if "<title>Boston University | Login</title>" in t:
+            login_generation = self.login_generation
+            r, t = await self.request(url, params=params, priority=priority)
+            head = t[:SENTINEL_CHARS]
+            if LOGIN_PAGE in head:
+                # the response was cut short, so login() starts from a fresh
+                # login page rather than this one
                 try:
-                    await self.login(r)
-                    continue
+                    await self.shared_login(login_generation)
                 except LoginError as e:
                     login_errors.append(e)
                     continue
-            elif "Web Login Service - Stale Request" in t:  # untested
+            elif STALE_REQUEST in head:  # untested
                 try:
-                    await self.login()
-                    continue
+                    await self.shared_login(login_generation)
                 except LoginError as e:
                     login_errors.append(e)
                     continue
-            return t
+            else:
+                return t
+            if after_login is not None:
+                await after_login()
         raise LoginError(login_errors or "unknown error")
 
+    async def shared_login(self, login_generation: int):
+        # every request that runs into the login page ends up here; only the
+        # first one logs in (one Duo push), the rest wait for it and retry
+        if self.login_generation != login_generation:
+            self.login_stats.replayed += 1
+            return
+        if self.login_task is None:
+            self.login_task = asyncio.create_task(self.login())
+            self.login_task.add_done_callback(self.finish_login)
+        else:
+            self.login_stats.parked += 1
+        await asyncio.shield(self.login_task)
+
+    def finish_login(self, task: asyncio.Task):
+        self.login_task = None
+        if task.cancelled() or task.exception() is not None:
+            self.login_stats.failures += 1
+        else:
+            self.login_stats.logins += 1
+
+    async def submit_form(
+        self, r: aiohttp.ClientResponse, t: str
+    ) -> aiohttp.ClientResponse:
+        # posts the first form on a page the way its javascript would
+        if (form := BeautifulSoup(t, FAST_PARSER).find("form")) is None:
+            raise LoginError(f"couldn't find a form to submit: {r.url}\n{t}")
+        return await self.session.post(
+            r.url.join(URL(form.get("action", ""))),
+            data={
+                i["name"]: i.get("value", "")
+                for i in form.find_all("input")
+                if i.get("name")
+            },
+        )
+
     async def login(self, r: aiohttp.ClientResponse = None):
         if r is None:
             r = await self.session.get(Module.mod_url("allsched.pl"))
@@ -138,7 +497,7 @@ class StudentLinkAuth(StudentLink):
             raise LoginError(f"unknown login page: {r.url}\n{t}")
         r2: aiohttp.ClientResponse
         t2 = await r2.text()
-        if "you must press the Continue button once to proceed." in t2:
+        if SAML_CONTINUE in t2:
             r8 = r2
         else:
             sid = r2.url.query.get("sid")
@@ -212,18 +571,6 @@ class StudentLinkAuth(StudentLink):
             #     ).with_query(sid=sid)
             # )
             # t3_5 = await r3_5.text()
-            r3_75 = await self.session.get(
-                URL(
-                    "https://api-c6b0c057.duosecurity.com/frame/v4/auth/prompt/data"
-                ).with_query(sid=sid, post_auth_action="OIDC_EXIT")
-            )
-            t3_75 = await r3_75.text()
-            json3_75 = await r3_75.json()
-            # fails here message enum 57 but no idea what that means
-
-            if not (device_key := json3_75.get("response").get("phones")[0]["key"]):
-                raise LoginError(f"couldn't find device_key in {json3_75}")
-
             # r3_5 = await self.session.post(
             #     URL("https://api-c6b0c057.duosecurity.com/frame/v4/prompt"),
             #     data={
@@ -233,21 +580,29 @@ class StudentLinkAuth(StudentLink):
             #         # "client_hints":
             #     }
             # )
-            # if "Logging you in..." in t3:  # duo remembers user
-            if False: # TODO: skip until we see if this is necessary
-                matches3 = re.findall(
-                    r'name="js_cookie" value="(.+)"[\S\s]+name="js_parent" value="(.+)"',
-                    t3,
-                )
-                try:
-                    ((duo_sig, parent),) = matches3
-                    duo_sig = html.unescape(duo_sig)
-                    parent = html.unescape(parent)
-                except ValueError:
-                    raise LoginError(
-                        f"couldn't find duo_sig and parent: {r3.url}\n{t3}"
-                    )
+            if SAML_CONTINUE in t3:
+                # duo remembers this device and sent us straight back to shib
+                self.logger.info("duo remembered this device")
+                self.login_stats.remembered += 1
+                r8 = r3
+            elif "Logging you in..." in t3:
+                # remembered as well, behind a page that submits itself
+                self.logger.info("duo remembered this device")
+                self.login_stats.remembered += 1
+                r8 = await self.submit_form(r3, t3)
             else:
+                r3_75 = await self.session.get(
+                    URL(
+                        "https://api-c6b0c057.duosecurity.com/frame/v4/auth/prompt/data"
+                    ).with_query(sid=sid, post_auth_action="OIDC_EXIT")
+                )
+                t3_75 = await r3_75.text()
+                json3_75 = await r3_75.json()
+                # fails here message enum 57 but no idea what that means
+
+                if not (device_key := json3_75.get("response").get("phones")[0]["key"]):
+                    raise LoginError(f"couldn't find device_key in {json3_75}")
+
                 sid = r3.url.query.get("sid")
                 if not sid:
                     raise LoginError(f"sid not found in {r3.url}")
@@ -321,6 +676,7 @@ class StudentLinkAuth(StudentLink):
             },
         )
         # t9 = await r9.text()
+        self.login_generation += 1
         self.logger.info("logged in")
 
     def module(self, module: Callable[..., M]) -> M:
@@ -0,0 +1,269 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple
+import asyncio
+import functools
+import math
+import pickle
+import sqlite3
+import time
+import weakref
+
+MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    errors: int
+    currsize: int
+    maxsize: int
+
+
+@dataclass
+class Entry:
+    task: asyncio.Task
+    expires: float = math.inf  # in-flight entries never expire
+
+
+class TTLCache:
+    def __init__(self, owner: AsyncCachedFunction):
+        self.owner = owner
+        self.entries: OrderedDict[Hashable, Entry] = OrderedDict()
+        self.last_sweep = time.monotonic()
+
+    def get(self, key: Hashable, now: float) -> Entry | None:
+        if (entry := self.entries.get(key)) is None:
+            return None
+        if entry.expires <= now:
+            del self.entries[key]
+            self.owner.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: Entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.owner.maxsize:
+            self.entries.popitem(last=False)
+            self.owner.evictions += 1
+
+    def sweep(self, now: float):
+        self.last_sweep = now
+        for key in [k for k, e in self.entries.items() if e.expires <= now]:
+            del self.entries[key]
+            self.owner.expirations += 1
+
+    def settle(self, key: Hashable, entry: Entry, task: asyncio.Task):
+        if self.entries.get(key) is not entry:  # evicted or replaced meanwhile
+            return
+        if task.cancelled():
+            del self.entries[key]
+        elif task.exception() is not None:
+            self.owner.errors += 1
+            if self.owner.error_ttl > 0:
+                entry.expires = time.monotonic() + self.owner.error_ttl
+            else:
+                del self.entries[key]
+        else:
+            entry.expires = time.monotonic() + self.owner.ttl
+
+
+class SQLiteCache:
+    # persistent backend for async_cache(persistent=True); values are pickled
+    # and the whole store is dropped when SCHEMA_VERSION changes
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str, schema_version: int = SCHEMA_VERSION):
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+        )
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE name = 'schema_version'"
+        ).fetchone()
+        if row is None or int(row[0]) != schema_version:
+            with self.db:
+                self.db.execute("DROP TABLE IF EXISTS entries")
+                self.db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)",
+                    (str(schema_version),),
+                )
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT,
+                key TEXT,
+                value BLOB,
+                expires REAL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self.db.commit()
+
+    def get(self, namespace: str, key: str):
+        row = self.db.execute(
+            "SELECT value, expires FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return MISSING
+        value, expires = row
+        if expires <= time.time():
+            with self.db:
+                self.db.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                )
+            return MISSING
+        try:
+            return pickle.loads(value)
+        except Exception:  # written by an incompatible version of the code
+            return MISSING
+
+    def set(self, namespace: str, key: str, value, ttl: float):
+        try:
+            data = pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (namespace, key, data, time.time() + ttl),
+            )
+
+    def sweep(self):
+        with self.db:
+            self.db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM entries")
+
+    def close(self):
+        self.db.close()
+
+
+class AsyncCachedFunction:
+    def __init__(
+        self,
+        func: Callable[..., Awaitable],
+        ttl: float,
+        maxsize: int,
+        error_ttl: float,
+        persistent: bool,
+        persistent_ttl: float,
+    ):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.error_ttl = error_ttl
+        self.persistent = persistent
+        self.persistent_ttl = persistent_ttl
+        self.namespace = f"{func.__module__}.{func.__qualname__}"
+        self.is_method = False
+        self.hits = self.misses = self.evictions = self.expirations = self.errors = 0
+        # methods get one cache per instance, held weakly so the cache never
+        # keeps a module (and through it a client) alive
+        self.caches: weakref.WeakKeyDictionary[Any, TTLCache] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.cache = TTLCache(self)
+
+    def __set_name__(self, owner, name):
+        self.is_method = True
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return functools.partial(self.__call__, instance)
+
+    def cache_for(self, instance) -> TTLCache:
+        if (cache := self.caches.get(instance)) is None:
+            cache = self.caches[instance] = TTLCache(self)
+        return cache
+
+    async def __call__(self, *args, **kwargs):
+        backend = None
+        if self.is_method:
+            cache = self.cache_for(args[0])
+            key_args = args[1:]
+            if self.persistent:
+                # the instance supplies the backend, e.g. Module.persistent_cache
+                backend = getattr(args[0], "persistent_cache", None)
+        else:
+            cache = self.cache
+            key_args = args
+        key = (key_args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:  # unhashable arguments can't be cached
+            self.misses += 1
+            return await self.func(*args, **kwargs)
+        now = time.monotonic()
+        if now - cache.last_sweep > self.ttl:
+            cache.sweep(now)
+        if (entry := cache.get(key, now)) is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = Entry(asyncio.create_task(self.load(backend, key, args, kwargs)))
+            cache.put(key, entry)
+            entry.task.add_done_callback(
+                functools.partial(cache.settle, key, entry)
+            )
+        # shield so that one cancelled caller doesn't cancel the shared task
+        return await asyncio.shield(entry.task)
+
+    async def load(self, backend: SQLiteCache | None, key: Hashable, args, kwargs):
+        if backend is None:
+            return await self.func(*args, **kwargs)
+        if (value := backend.get(self.namespace, repr(key))) is not MISSING:
+            return value
+        value = await self.func(*args, **kwargs)
+        backend.set(self.namespace, repr(key), value, self.persistent_ttl)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.expirations,
+            self.errors,
+            len(self.cache.entries)
+            + sum(len(c.entries) for c in self.caches.values()),
+            self.maxsize,
+        )
+
+    def cache_clear(self):
+        self.cache.entries.clear()
+        self.caches.clear()
+
+
+def async_cache(
+    ttl_seconds: float,
+    *,
+    maxsize: int = 1024,
+    error_ttl: float = 0,
+    persistent: bool = False,
+    persistent_ttl: float = None,
+):
+    # concurrent calls with the same arguments share one in-flight call;
+    # exceptions are only replayed if error_ttl is set. persistent methods
+    # also go through the instance's persistent_cache, keyed without self
+    def decorator(func):
+        return AsyncCachedFunction(
+            func,
+            ttl_seconds,
+            maxsize,
+            error_ttl,
+            persistent,
+            ttl_seconds if persistent_ttl is None else persistent_ttl,
+        )
+
+    return decorator
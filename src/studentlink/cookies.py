@@ -0,0 +1,43 @@
+from __future__ import annotations
+from http.cookies import Morsel
+from typing import Iterable
+from yarl import URL
+import aiohttp
+import os
+import pathlib
+import pickle
+
+
+class PersistentCookieJar(aiohttp.CookieJar):
+    # saved whenever a response changes a cookie instead of only at shutdown,
+    # so a crash never loses a login; the file is replaced atomically
+    def __init__(self, path: str | os.PathLike, **kwargs):
+        super().__init__(**kwargs)
+        self.path = pathlib.Path(path)
+        self.saves = 0
+        try:
+            self.load(self.path)
+        except FileNotFoundError:
+            pass
+        except (pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+            pass  # unreadable jar, start logged out
+        self.saved = self.fingerprint()
+
+    def fingerprint(self) -> frozenset:
+        morsels: Iterable[Morsel] = self
+        return frozenset(
+            (m["domain"], m["path"], m.key, m.value) for m in morsels
+        )
+
+    def update_cookies(self, cookies, response_url: URL = URL()):
+        super().update_cookies(cookies, response_url)
+        if cookies and (fingerprint := self.fingerprint()) != self.saved:
+            self.save(self.path)
+            self.saved = fingerprint
+
+    def save(self, file_path: str | os.PathLike):
+        file_path = pathlib.Path(file_path)
+        temporary = file_path.with_name(f"{file_path.name}.tmp")
+        super().save(temporary)
+        os.replace(temporary, file_path)
+        self.saves += 1
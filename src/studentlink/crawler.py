@@ -0,0 +1,159 @@
+from __future__ import annotations
+from typing import AsyncIterator
+import asyncio
+import contextlib
+import os
+import pathlib
+import pickle
+
+from . import StudentLink
+from .modules.browse_schedule import BrowseSchedule, RegClassView
+from .modules.reg import Add
+from .ratelimit import RateLimiter
+from .scheduler import Priority, priority
+from .util import Semester
+
+# what pickle raises on a checkpoint that was cut short or isn't one
+UNREADABLE = (pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError)
+
+
+class CatalogCrawler:
+    # walks the browse pages of every college of a semester, following the
+    # next query each page ends with. colleges are walked concurrently, the
+    # pages of one college in order since each needs the one before. what
+    # has been fetched is kept (and saved to checkpoint, if given), so a
+    # crawl that was interrupted picks up where it stopped
+    def __init__(
+        self,
+        client: StudentLink,
+        semester: Semester,
+        *,
+        concurrency: int = 4,
+        rate: float = None,
+        lane: Priority = Priority.BACKGROUND,
+        checkpoint: str | os.PathLike = None,
+    ):
+        self.client = client
+        self.semester = semester
+        self.concurrency = concurrency
+        # pages per second for the crawl, on top of the client's own limits
+        self.limiter = (
+            RateLimiter(rate, min_rate=rate, max_rate=rate, burst=1) if rate else None
+        )
+        self.lane = lane
+        self.checkpoint = pathlib.Path(checkpoint) if checkpoint else None
+        self.colleges: list[str] = None
+        # the query for the next page of each college, None once it's done
+        self.pending: dict[str, list[str] | None] = {}
+        self.views: dict[str, list[RegClassView]] = {}
+        self.pages = 0
+        if self.checkpoint is not None:
+            self.load()
+
+    def load(self):
+        # the checkpoint is a log: the semester and its colleges, then one
+        # record per page, so saving a page costs the page and not the crawl
+        try:
+            f = open(self.checkpoint, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            try:
+                semester, colleges = pickle.load(f)
+            except UNREADABLE:
+                return  # unreadable checkpoint, start over
+            if semester != int(self.semester):
+                return
+            self.colleges = colleges
+            self.pending = {college: [college] for college in colleges}
+            self.views = {college: [] for college in colleges}
+            end = f.tell()
+            while True:
+                try:
+                    college, views, next_query = pickle.load(f)
+                except UNREADABLE:
+                    break  # the end, or a page cut short by an interruption
+                self.views[college] += views
+                self.pending[college] = next_query
+                end = f.tell()
+        # drops a cut-short page so later pages are appended after a good one
+        os.truncate(self.checkpoint, end)
+
+    def save(self, record: tuple, mode: str = "ab"):
+        with open(self.checkpoint, mode) as f:
+            pickle.dump(record, f)
+
+    @property
+    def done(self) -> bool:
+        return self.colleges is not None and not any(self.pending.values())
+
+    async def catalog(self) -> list[RegClassView]:
+        return [view async for view in self.crawl()]
+
+    async def crawl(self) -> AsyncIterator[RegClassView]:
+        # yields the whole catalog: whatever an earlier crawl fetched first,
+        # then the rest as it comes in
+        for views in list(self.views.values()):
+            for view in views:
+                yield view
+        with priority(self.lane):  # tasks created in here inherit the lane
+            if self.colleges is None:
+                self.colleges = await self.client.module(Add).get_college_codes(
+                    self.semester
+                )
+                for college in self.colleges:
+                    self.pending.setdefault(college, [college])
+                    self.views.setdefault(college, [])
+                if self.checkpoint is not None:
+                    # Semester can't be unpickled, so the header holds its key
+                    self.save((int(self.semester), self.colleges), "wb")
+            queue: asyncio.Queue[list[RegClassView] | None] = asyncio.Queue()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            tasks = [
+                asyncio.create_task(self.walk(college, semaphore, queue))
+                for college, query in self.pending.items()
+                if query is not None
+            ]
+        finished = asyncio.gather(*tasks)
+        finished.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (views := await queue.get()) is not None:
+                for view in views:
+                    yield view
+            await finished  # raises the first error of any college
+        finally:  # also when the caller stops iterating, or a college failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(finished, *tasks, return_exceptions=True)
+
+    async def walk(
+        self, college: str, semaphore: asyncio.Semaphore, queue: asyncio.Queue
+    ):
+        browse = self.client.module(BrowseSchedule)
+        async with semaphore:
+            if (query := self.pending[college]) is None:
+                return
+            if self.limiter is not None:
+                await self.limiter.acquire(self.lane)
+            # the next page is fetched while this one is parsed
+            async with contextlib.aclosing(
+                browse.iter_pages(self.semester, *query, within_college=True)
+            ) as pages:
+                async for views, next_query in pages:
+                    # the next page may start where this one ended, and the
+                    # last page of a college may run into the next one
+                    previous = self.views[college][-len(views) :] if views else []
+                    seen = {view.abbr for view in previous}
+                    views = [
+                        view
+                        for view in views
+                        if view.abbr.parts[0] == college and view.abbr not in seen
+                    ]
+                    self.views[college] += views
+                    self.pending[college] = next_query
+                    self.pages += 1
+                    if self.checkpoint is not None:
+                        self.save((college, views, next_query))
+                    await queue.put(views)
+                    if next_query is not None and self.limiter is not None:
+                        await self.limiter.acquire(self.lane)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, time
-from studentlink.util import normalize, Abbr
+from studentlink.util import normalize, Abbr, InternTable
 from .vo import View
 from enum import IntEnum
 from bs4.element import Tag
@@ -24,7 +24,7 @@ class Weekday(IntEnum):
     Sa = 6
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ClassView(View):
     abbr: Abbr
     cr_hrs: str = None
@@ -32,19 +32,19 @@ class ClassView(View):
     instructor: str = None
     topic: str = None
     type: str = None
-    schedule: list[Event] = None
+    schedule: tuple[Event, ...] = None
     notes: str = None
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class RegisteredClassView(ClassView):
     status: str = None
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ScheduleClassView(RegisteredClassView):
     semester: str = None
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Event(View):
     day: Weekday
     start: time
@@ -52,9 +52,50 @@ class Event(View):
     building: Building = None
     room: str = None
 
+    interned = InternTable()
 
-@dataclass(frozen=True, kw_only=True)
+    @classmethod
+    def of(
+        cls,
+        day: Weekday,
+        start: time,
+        stop: time,
+        building: Building = None,
+        room: str = None,
+    ) -> Event:
+        return cls.interned.get(
+            (day, start, stop, building, room),
+            cls,
+            day=day,
+            start=start,
+            stop=stop,
+            building=building,
+            room=room,
+        )
+
+    def __reduce__(self):  # re-intern when unpickled, e.g. from a parse worker
+        return Event.of, (self.day, self.start, self.stop, self.building, self.room)
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Building(View):
     abbreviation: str
     description: str = None
     address: str = None
+
+    interned = InternTable()
+
+    @classmethod
+    def of(
+        cls, abbreviation: str, description: str = None, address: str = None
+    ) -> Building:
+        return cls.interned.get(
+            (abbreviation, description, address),
+            cls,
+            abbreviation=abbreviation,
+            description=description,
+            address=address,
+        )
+
+    def __reduce__(self):
+        return Building.of, (self.abbreviation, self.description, self.address)
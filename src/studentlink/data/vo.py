@@ -2,4 +2,5 @@ from dataclasses import dataclass
 
 @dataclass(frozen=True, kw_only=True)
 class View:
-    pass
\ No newline at end of file
+    # subclasses are slotted; keep them weak-referenceable for InternTable
+    __slots__ = ("__weakref__",)
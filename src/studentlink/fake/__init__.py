@@ -0,0 +1,6 @@
+# a local stand-in for studentlink and its login servers, and recording of
+# live pages for it to replay
+from .catalog import FakeEvent, FakeSection, make_catalog
+from .record import Corpus, Recorder
+from .server import FakeServer, ServerStats
+from .session import LocalSession
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import random
+
+COLLEGES = ["CAS", "COM", "ENG", "QST", "SAR", "CFA", "SPH", "WED"]
+DEPARTMENTS = ["BI", "CH", "CS", "EC", "EK", "MA", "PH", "PY", "WR"]
+BUILDINGS = ["CAS", "PHO", "SCI", "EPC", "KCB", "STO", "WED", "COM", "GCB", "LAW"]
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Mon,Wed", "Tue,Thu", "Mon,Wed,Fri"]
+TIMES = [
+    ("8:00am", "9:15am"),
+    ("9:30am", "10:45am"),
+    ("11:00am", "12:15pm"),
+    ("12:30pm", "1:45pm"),
+    ("2:00pm", "3:15pm"),
+    ("3:30pm", "4:45pm"),
+    ("5:00pm", "7:45pm"),
+]
+
+
+@dataclass
+class FakeEvent:
+    building: str | None  # None is shown as "NO ROOM"
+    room: str | None
+    days: str
+    start: str
+    stop: str
+
+
+@dataclass
+class FakeSection:
+    college: str
+    department: str
+    course: str
+    section: str
+    reg_id: str
+    title: str
+    instructor: str
+    open_seats: int
+    events: list[FakeEvent] = field(default_factory=list)
+    cr_hrs: str = "4.0"
+    type: str = "Lec"
+    topic: str = ""
+    notes: str = ""
+
+    @property
+    def abbr(self) -> str:
+        return f"{self.college} {self.department}{self.course} {self.section}"
+
+    @property
+    def key(self) -> tuple[str, str, str, str]:
+        return self.college, self.department, self.course, self.section
+
+
+def make_events(rng: random.Random, count: int) -> list[FakeEvent]:
+    events = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            building = room = None
+        else:
+            building, room = rng.choice(BUILDINGS), str(rng.randint(100, 400))
+        events.append(FakeEvent(building, room, rng.choice(DAYS), *rng.choice(TIMES)))
+    return events
+
+
+def make_catalog(
+    sections: int = 2000,
+    events: int = 2,
+    seed: int = 0,
+    colleges: list[str] = COLLEGES,
+    departments: list[str] = DEPARTMENTS,
+) -> list[FakeSection]:
+    # a sorted catalog, spread over colleges and departments the way browse
+    # pages list it; every section gets a distinct reg_id
+    rng = random.Random(seed)
+    catalog = []
+    per_course = 3
+    courses = [
+        (college, department, f"{course:03d}")
+        for college in colleges
+        for department in departments
+        for course in range(100, 1000, 7)
+    ]
+    for i in range(sections):
+        college, department, course = courses[i // per_course % len(courses)]
+        section = f"{'ABC'[i % per_course]}{1 + i // (per_course * len(courses)) % 9}"
+        catalog.append(
+            FakeSection(
+                college=college,
+                department=department,
+                course=course,
+                section=section,
+                reg_id=f"{seed:03d}{i:07d}",
+                title=f"{department} Course {course}",
+                instructor=f"Instructor {rng.randint(1, 500)}",
+                open_seats=rng.choice((0, 0, 0, 1, 2, 5, 10, 25)),
+                events=make_events(rng, events),
+                topic=rng.choice(("", "", "Special Topic")),
+            )
+        )
+    catalog.sort(key=lambda s: s.key)
+    return catalog
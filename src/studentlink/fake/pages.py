@@ -0,0 +1,300 @@
+from __future__ import annotations
+from html import escape
+from studentlink.util import Sem, Semester
+from .catalog import FakeEvent, FakeSection
+
+# markup follows the live pages closely enough for the module parsers; only
+# the parts the parsers and the login flow look at are reproduced
+
+REFUSED = "<HTML><BODY>Server not available: Connection refused</BODY></HTML>"
+ERROR = (
+    "<HTML><HEAD><TITLE>Error &middot; Boston University</TITLE></HEAD>"
+    "<BODY>Something went wrong</BODY></HTML>"
+)
+UNAVAILABLE = (
+    "<HTML><BODY>You requested a registration option not available for the "
+    "semester.</BODY></HTML>"
+)
+NO_CLASSES = "<HTML><BODY>No classes found for specified search criteria</BODY></HTML>"
+
+
+def semester_name(semester: Semester) -> str:
+    match semester.semester:
+        case Sem.SUMMER1:
+            name = "Summer 1"
+        case Sem.SUMMER2:
+            name = "Summer 2"
+        case sem:
+            name = sem.name.title()
+    return f"{name} {semester.year}"
+
+
+def event_cells(events: list[FakeEvent], *, link: bool = False) -> list[str]:
+    buildings, rooms, days, starts, stops = [], [], [], [], []
+    for e in events:
+        if e.building is None:
+            buildings.append("NO")
+            rooms.append("ROOM")
+        elif link:
+            buildings.append(f'<A HREF="bldg.pl?BldgCd={e.building}">{e.building}</A>')
+            rooms.append(e.room)
+        else:
+            buildings.append(e.building)
+            rooms.append(e.room)
+        days.append(e.days)
+        starts.append(e.start)
+        stops.append(e.stop)
+    return ["<BR>".join(cells) for cells in (buildings, rooms, days, starts, stops)]
+
+
+def title_cell(s: FakeSection) -> str:
+    return f"{escape(s.title)}<BR>{escape(s.instructor)}"
+
+
+def browse_page(sections: list[FakeSection], next_section: FakeSection = None) -> str:
+    rows = []
+    for s in sections:
+        if s.open_seats > 0:
+            selector = f'<INPUT TYPE=checkbox NAME=SelectIt VALUE="{s.reg_id}">'
+        else:
+            selector = '<A HREF="javascript:full()">Full</A>'
+        b, r, d, start, stop = event_cells(s.events)
+        rows.append(
+            f'<TR ALIGN=center VALIGN=top><TD>{selector}</TD><TD><IMG SRC="x.gif"></TD>'
+            f'<TD><A HREF="info">{s.abbr}</A></TD><TD>{title_cell(s)}</TD>'
+            f"<TD>{s.topic or '&nbsp;'}</TD><TD>{s.open_seats}</TD><TD>{s.cr_hrs}</TD>"
+            f'<TD>{s.type}</TD><TD><A HREF="bldg">{b}</A></TD><TD>{r}</TD><TD>{d}</TD>'
+            f"<TD>{start}</TD><TD>{stop}</TD><TD>{s.notes or '&nbsp;'}</TD></TR>\n"
+        )
+    if next_section is None:
+        next_query = ""
+    else:
+        next_query = (
+            f'<INPUT TYPE=text NAME="College" SIZE=3 VALUE="{next_section.college}" onFocus="ClearCollege();">\n'
+            f'<INPUT TYPE=text NAME="Dept" SIZE=2 VALUE="{next_section.department}">\n'
+            f'<INPUT TYPE=text NAME="Course" SIZE=3 VALUE="{next_section.course}">\n'
+            f'<INPUT TYPE=text NAME="Section" SIZE=2 VALUE="{next_section.section}">\n'
+        )
+    return (
+        "<HTML><HEAD><TITLE>Browse Schedule</TITLE></HEAD><BODY>\n"
+        '<FORM NAME="SelectForm" METHOD=POST ACTION="confirm_classes.pl">\n<TABLE BORDER=0>\n'
+        "<TR><TH>Select</TH><TH></TH><TH>Class</TH><TH>Title</TH><TH>Topic</TH>"
+        "<TH>Open Seats</TH><TH>Cr Hrs</TH><TH>Type</TH><TH>Bldg</TH><TH>Room</TH>"
+        "<TH>Day</TH><TH>Start</TH><TH>Stop</TH><TH>Notes</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE>\n</FORM>\n"
+        + '<FORM NAME="NextForm" METHOD=GET>\n'
+        + next_query
+        + "</FORM>\n</BODY></HTML>"
+    )
+
+
+def drop_page(registered: list[FakeSection]) -> str:
+    rows = []
+    for s in registered:
+        b, r, d, start, stop = event_cells(s.events)
+        rows.append(
+            f'<TR><TD><INPUT TYPE=radio NAME="DropIt" VALUE="{s.reg_id}"></TD>'
+            f"<TD>{s.abbr}</TD><TD>REG-ST</TD><TD>{s.cr_hrs}</TD><TD>{title_cell(s)}</TD>"
+            f"<TD>{s.type}</TD><TD>{b}</TD><TD>{r}</TD><TD>{d}</TD><TD>{start}</TD><TD>{stop}</TD></TR>\n"
+        )
+    return (
+        '<HTML><BODY><FORM NAME="SelectForm" METHOD=POST ACTION="confirm_drop.pl"></FORM>\n'
+        "<TABLE>\n<TR><TH>Drop</TH><TH>Class</TH><TH>Status</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def plan_page(semester: Semester, planned: list[FakeSection]) -> str:
+    rows = []
+    for s in planned:
+        b, r, d, start, stop = event_cells(s.events)
+        rows.append(
+            f'<TR><TD><A HREF="remove">Remove</A></TD><TD>{s.abbr}</TD><TD>{s.open_seats}</TD>'
+            f"<TD>{s.cr_hrs}</TD><TD>{title_cell(s)}</TD><TD>{s.topic or '&nbsp;'}</TD>"
+            f'<TD>{s.type}</TD><TD><A HREF="bldg">{b}</A></TD><TD>{r}</TD><TD>{d}</TD>'
+            f"<TD>{start}</TD><TD>{stop}</TD><TD>{s.notes or '&nbsp;'}</TD></TR>\n"
+        )
+    return (
+        f"<HTML><BODY><B>Semester:</B> {semester_name(semester)}\n"
+        "<TABLE>\n<TR><TH>Remove</TH><TH>Class</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def section_page(semester: Semester, registered: list[FakeSection]) -> str:
+    rows = []
+    for i, s in enumerate(registered):
+        abbr = f'<A HREF="switch">{s.abbr}</A>' if i % 2 else s.abbr
+        b, r, d, start, stop = event_cells(s.events)
+        rows.append(
+            f"<TR><TD>{abbr}</TD><TD>REG-ST</TD><TD>{s.cr_hrs}</TD><TD>{title_cell(s)}</TD>"
+            f"<TD>{s.type}</TD><TD>{b}</TD><TD>{r}</TD><TD>{d}</TD><TD>{start}</TD><TD>{stop}</TD></TR>\n"
+        )
+    return (
+        f"<HTML><BODY><TABLE><TR><TH>Semester:</TH><TD>{semester_name(semester)}</TD></TR></TABLE>\n"
+        "<TABLE>\n<TR><TH>Class</TH><TH>Status</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def regsched_page(schedules: dict[Semester, list[FakeSection]]) -> str:
+    rows = []
+    for semester, registered in schedules.items():
+        if not registered:
+            continue
+        for i, s in enumerate(registered):
+            head = (
+                f"<TD ROWSPAN={len(registered)}>{semester_name(semester)}\n(current)</TD>"
+                if i == 0
+                else ""
+            )
+            b, r, d, start, stop = event_cells(s.events)
+            rows.append(
+                f"<TR>{head}<TD>{s.abbr}</TD><TD>REG-ST</TD><TD>{s.cr_hrs}</TD><TD>{title_cell(s)}</TD>"
+                f'<TD>{s.topic or "&nbsp;"}</TD><TD>{s.type}</TD><TD><A HREF="bldg">{b}</A></TD><TD>{r}</TD>'
+                f"<TD>{d}</TD><TD>{start}</TD><TD>{stop}</TD><TD>{s.notes or '&nbsp;'}</TD></TR>\n"
+            )
+        credits = sum(float(s.cr_hrs) for s in registered)
+        rows.append(f"<TR><TD><B>Total&nbsp;Credits</B></TD><TD>{credits:g}</TD></TR>\n")
+    return (
+        "<HTML><BODY><TABLE>\n<TR><TH>Semester</TH><TH>Class</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def allsched_page(schedules: dict[Semester, list[FakeSection]]) -> str:
+    rows = []
+    for semester, registered in schedules.items():
+        if not registered:
+            continue
+        for i, s in enumerate(registered):
+            head = (
+                f"<TD ROWSPAN={len(registered)}><FONT>{semester_name(semester)}\nRegistered</FONT></TD>"
+                if i == 0
+                else ""
+            )
+            b, r, d, start, stop = event_cells(s.events, link=True)
+            rows.append(
+                f"<TR>{head}<TD>{s.abbr}</TD><TD>&nbsp;</TD><TD>REG-ST</TD><TD>{s.cr_hrs}</TD>"
+                f"<TD><FONT>{title_cell(s)}</FONT></TD><TD>{s.topic or '&nbsp;'}</TD><TD>{s.type}</TD>"
+                f"<TD><FONT>{b}</FONT></TD><TD><FONT>{r}</FONT></TD><TD><FONT>{d}</FONT></TD>"
+                f"<TD><FONT>{start}</FONT></TD><TD><FONT>{stop}</FONT></TD><TD>{s.notes or '&nbsp;'}</TD></TR>\n"
+            )
+    return (
+        "<HTML><BODY><TABLE>\n<TR><TH>Semester</TH><TH>Class</TH></TR>\n"
+        + "".join(rows)
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def confirm_classes_page(
+    semester: Semester, results: list[tuple[FakeSection, bool, str]]
+) -> str:
+    rows = "".join(
+        '<TR><TD><IMG SRC="https://www.bu.edu/link/student/images/'
+        f'{"checkmark" if ok else "xmark"}.gif"></TD>'
+        f"<TD>{s.abbr}</TD><TD>{s.title}</TD><TD>{message}</TD></TR>\n"
+        for s, ok, message in results
+    )
+    return (
+        f"<HTML><BODY><B>Semester: </B>{semester_name(semester)}<TABLE>\n"
+        "<TR><TH>Status</TH><TH>Class</TH><TH>Title</TH><TH>Message</TH></TR>\n"
+        + rows
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def confirm_drop_page(
+    semester: Semester, results: list[tuple[FakeSection, bool, str]]
+) -> str:
+    rows = "".join(
+        f'<TR><TD>{s.abbr}</TD><TD>{"DRP-ST" if ok else "REG-ST"}</TD>'
+        f"<TD>{s.title}</TD><TD>{message}</TD></TR>\n"
+        for s, ok, message in results
+    )
+    return (
+        f"<HTML><BODY><B>Semester:</B>{semester_name(semester)}<TABLE>\n"
+        "<TR><TH>Class</TH><TH>Status</TH><TH>Title</TH><TH>Message</TH></TR>\n"
+        + rows
+        + "</TABLE></BODY></HTML>"
+    )
+
+
+def add_page(colleges: list[str]) -> str:
+    options = "".join(f"<OPTION>{college}\n" for college in colleges)
+    return (
+        '<HTML><BODY><FORM NAME="BrowseForm" ACTION="browse_schedule.pl">\n'
+        f'<SELECT NAME=College onChange="ClearCollege();">\n{options}</SELECT>\n'
+        "</FORM></BODY></HTML>"
+    )
+
+
+def reg_option_page(semester: Semester) -> str:
+    return (
+        f"<HTML><BODY>Registration options for {semester_name(semester)}\n"
+        '<A HREF="reg/add/_start.pl">Add</A></BODY></HTML>'
+    )
+
+
+def bldg_page(abbreviation: str) -> str:
+    return (
+        "<HTML><BODY><TABLE>\n"
+        f"<TR><TD ALIGN=right>Abbreviation:\n</TD><TD ALIGN=left>{abbreviation}\n</TD></TR>\n"
+        f"<TR><TD ALIGN=right>Description:\n</TD><TD ALIGN=left>{abbreviation} Building\n</TD></TR>\n"
+        f"<TR><TD ALIGN=right>Address:\n</TD><TD ALIGN=left>{len(abbreviation) * 111} Commonwealth Ave\n</TD></TR>\n"
+        "</TABLE></BODY></HTML>"
+    )
+
+
+def login_page(csrf_token: str, error: str = "") -> str:
+    return (
+        "<html><head><title>Boston University | Login</title></head><body>\n"
+        "<p>You have asked to login to StudentLink</p>\n"
+        f"<p>{error}</p>\n"
+        '<form method="post">\n'
+        f'<input type="hidden" name="csrf_token" value="{csrf_token}" />\n'
+        '<input name="j_username"><input name="j_password" type="password">\n'
+        "</form></body></html>"
+    )
+
+
+def duo_page(csrf_token: str, tx: str, xsrf: str, two_step: bool = False) -> str:
+    return (
+        "<html><head><title>Boston University | Login</title></head><body>\n"
+        + ("<p>Two-Step Login Started</p>\n" if two_step else "")
+        + '<form method="post">\n'
+        f'<input type="hidden" name="csrf_token" value="{csrf_token}" />\n'
+        f'<input type="hidden" name="tx" value="{tx}" />\n'
+        f'<input type="hidden" name="_xsrf" value="{xsrf}" />\n'
+        "</form></body></html>"
+    )
+
+
+def saml_continue_page(relay_state: str, saml_response: str) -> str:
+    return (
+        "<html><body>\n"
+        "<p>Since your browser does not support JavaScript, "
+        "you must press the Continue button once to proceed.</p>\n"
+        '<form action="/Shibboleth.sso/SAML2/POST" method="post">\n'
+        f'<input type="hidden" name="RelayState" value="{escape(relay_state)}"/>\n'
+        f'<input type="hidden" name="SAMLResponse" value="{escape(saml_response)}"/>\n'
+        '<input type="submit" value="Continue"/>\n'
+        "</form></body></html>"
+    )
+
+
+def logging_in_page(action: str, fields: dict[str, str]) -> str:
+    inputs = "".join(
+        f'<input type="hidden" name="{name}" value="{escape(value)}">\n'
+        for name, value in fields.items()
+    )
+    return (
+        "<html><body onload=\"document.forms[0].submit()\">\n"
+        "<p>Logging you in...</p>\n"
+        f'<form action="{action}" method="post">\n{inputs}</form></body></html>'
+    )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+from typing import Iterable
+from yarl import URL
+import hashlib
+import json
+import os
+import pathlib
+import re
+
+# the same sentinels the client looks for; pages behind a login are not
+# worth keeping
+NOT_RECORDED = (
+    "<title>Boston University | Login</title>",
+    "Web Login Service - Stale Request",
+    "not available: Connection refused",
+)
+SCRUB = (
+    (re.compile(r"\bU\d{8}\b"), "U00000000"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "student@example.com"),
+    (re.compile(r"uiscgi_studentlink\.pl/\d+"), "uiscgi_studentlink.pl/0"),
+)
+
+
+def page_key(module: str, params: dict[str, str]) -> tuple:
+    return module, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+class Recorder:
+    # writes every studentlink page a client fetches to a corpus a FakeServer
+    # can replay. ids, emails, the timestamps in links and any strings given
+    # in scrub (the username and password, say) are replaced on the way out
+    def __init__(self, directory: str | os.PathLike, scrub: Iterable[str] = ()):
+        self.directory = pathlib.Path(directory)
+        (self.directory / "pages").mkdir(parents=True, exist_ok=True)
+        self.scrub = [s for s in scrub if s]
+        self.index: dict[tuple, dict] = {
+            page_key(e["module"], e["params"]): e for e in load_index(self.directory)
+        }
+        self.recorded = 0
+
+    def scrubbed(self, page: str) -> str:
+        for pattern, replacement in SCRUB:
+            page = pattern.sub(replacement, page)
+        for secret in self.scrub:
+            page = page.replace(secret, "scrubbed")
+        return page
+
+    def record(self, url: str | URL, page: str):
+        url = URL(url)
+        if (module := url.query.get("ModuleName")) is None:
+            return
+        if any(sentinel in page[:4096] for sentinel in NOT_RECORDED):
+            return
+        params = {k: v for k, v in url.query.items() if k != "ModuleName"}
+        key = page_key(module, params)
+        name = hashlib.sha1(repr(key).encode()).hexdigest()[:16] + ".html"
+        (self.directory / "pages" / name).write_text(self.scrubbed(page), "utf-8")
+        self.index[key] = {"module": module, "params": dict(key[1]), "file": name}
+        self.save()
+        self.recorded += 1
+
+    def save(self):
+        path = self.directory / "index.json"
+        temporary = path.with_name(f"{path.name}.tmp")
+        temporary.write_text(json.dumps(list(self.index.values()), indent=1))
+        os.replace(temporary, path)
+
+
+def load_index(directory: pathlib.Path) -> list[dict]:
+    try:
+        return json.loads((directory / "index.json").read_text())
+    except FileNotFoundError:
+        return []
+
+
+class Corpus:
+    # recorded pages by module and query, read from disk on first use
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = pathlib.Path(directory)
+        self.files = {
+            page_key(e["module"], e["params"]): e["file"]
+            for e in load_index(self.directory)
+        }
+        self.pages: dict[tuple, str] = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def get(self, module: str, params: dict[str, str]) -> str | None:
+        key = page_key(module, params)
+        if key not in self.pages:
+            if (name := self.files.get(key)) is None:
+                return None
+            self.pages[key] = (self.directory / "pages" / name).read_text("utf-8")
+        return self.pages[key]
@@ -0,0 +1,466 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from aiohttp import web
+from yarl import URL
+import asyncio
+import random
+import secrets
+import time
+
+from studentlink.util import Semester
+from . import pages
+from .catalog import FakeSection, make_catalog
+from .record import Corpus
+
+STUDENTLINK = "/link/bin/uiscgi_studentlink.pl"
+SSO = "/idp/profile/SAML2/Redirect/SSO"
+SIMPLE_SIGN = "/idp/profile/SAML2/POST-SimpleSign/SSO"
+DUO_CALLBACK = "/idp/profile/Authn/Duo/2FA/duo-callback"
+FRAMELESS = "/frame/frameless/v4/auth"
+ACS = "/Shibboleth.sso/SAML2/POST"
+# studentlink's session, shib's session and duo's remembered device
+SESSION_COOKIE = "fake_studentlink"
+SHIB_COOKIE = "fake_shib"
+REMEMBER_COOKIE = "fake_duo_remember"
+REMEMBERED_BRANCHES = ("redirect", "form")
+
+
+@dataclass
+class ServerStats:
+    requests: Counter[str] = field(default_factory=Counter)
+    refused: int = 0
+    expired: int = 0
+    logins: int = 0
+    pushes: int = 0
+    remembered: int = 0
+    registrations: int = 0
+    # seconds from a full section opening up to someone registering for it
+    grabs: list[float] = field(default_factory=list)
+
+
+@dataclass
+class FakeSession:
+    username: str
+    semester: Semester = None
+    seen: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DuoTransaction:
+    username: str
+    tx: str
+    xsrf: str
+    txid: str = None
+    polls: int = 0
+    allowed: bool = False
+
+
+@dataclass
+class Catalog:
+    sections: list[FakeSection]
+    keys: list[tuple[str, str, str, str]]
+    by_reg_id: dict[str, FakeSection]
+
+
+def html(page: str, **kwargs) -> web.Response:
+    # like studentlink, no charset in the content type
+    return web.Response(body=page.encode(), content_type="text/html", **kwargs)
+
+
+class FakeServer:
+    # studentlink, shib and duo on one local port, for use with LocalSession.
+    # pages are generated from a fake catalog per semester unless a recorded
+    # corpus has them; latency, throttling (the "connection refused" page),
+    # session expiry and seats opening up are all simulated
+    def __init__(
+        self,
+        accounts: dict[str, str],
+        *,
+        sections: int = 2000,
+        events: int = 2,
+        page_size: int = 100,
+        latency: float = 0,
+        throttle: float = None,
+        session_ttl: float = None,
+        duo_remembers: bool = False,
+        remembered_branch: str = "redirect",
+        push_delay: float = 0,
+        reg_open: bool = True,
+        churn: float = 0,
+        corpus: Corpus | str = None,
+        seed: int = 0,
+    ):
+        if remembered_branch not in REMEMBERED_BRANCHES:
+            raise ValueError(f"remembered_branch must be one of {REMEMBERED_BRANCHES}")
+        self.accounts = accounts
+        self.sections = sections
+        self.events = events
+        self.page_size = page_size
+        self.latency = latency
+        # requests per second across all sessions before pages are refused
+        self.throttle = throttle
+        self.tokens = throttle or 0
+        self.refilled = time.monotonic()
+        self.session_ttl = session_ttl
+        self.duo_remembers = duo_remembers
+        self.remembered_branch = remembered_branch
+        self.push_delay = push_delay
+        self.reg_open = reg_open
+        # sections per second whose open seats change
+        self.churn = churn
+        self.corpus = Corpus(corpus) if isinstance(corpus, str) else corpus
+        self.rng = random.Random(seed)
+        self.stats = ServerStats()
+        self.catalogs: dict[Semester, Catalog] = {}
+        self.opened: dict[str, float] = {}
+        self.registered: defaultdict[str, defaultdict[Semester, list[FakeSection]]] = (
+            defaultdict(lambda: defaultdict(list))
+        )
+        self.planned: defaultdict[str, defaultdict[Semester, list[FakeSection]]] = (
+            defaultdict(lambda: defaultdict(list))
+        )
+        self.sessions: dict[str, FakeSession] = {}
+        self.shib_sessions: dict[str, str] = {}
+        self.remembered: dict[str, str] = {}
+        self.duo: dict[str, DuoTransaction] = {}
+        self.assertions: dict[str, str] = {}
+        self.executions = 0
+        self.runner: web.AppRunner = None
+        self.churn_task: asyncio.Task = None
+        self.url: URL = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(STUDENTLINK, self.studentlink)
+        app.router.add_get(STUDENTLINK + "/{timestamp}", self.studentlink)
+        app.router.add_get(SSO, self.sso)
+        app.router.add_post(SIMPLE_SIGN, self.simple_sign)
+        app.router.add_get(FRAMELESS, self.frameless)
+        app.router.add_post(FRAMELESS, self.frameless_auth)
+        app.router.add_get("/frame/v4/auth/prompt", self.prompt_page)
+        app.router.add_get("/frame/v4/auth/prompt/data", self.prompt_data)
+        app.router.add_post("/frame/v4/prompt", self.prompt)
+        app.router.add_post("/frame/v4/status", self.status)
+        app.router.add_post("/frame/v4/oidc/exit", self.oidc_exit)
+        app.router.add_route("*", DUO_CALLBACK, self.duo_callback)
+        app.router.add_post(ACS, self.assertion_consumer)
+        return app
+
+    async def start(self) -> URL:
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        # a host name, since cookie jars ignore cookies from IP addresses
+        self.url = URL(f"http://localhost:{port}")
+        if self.churn:
+            self.churn_task = asyncio.create_task(self.churn_seats())
+        return self.url
+
+    async def stop(self):
+        if self.churn_task is not None:
+            self.churn_task.cancel()
+            self.churn_task = None
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    def catalog(self, semester: Semester) -> Catalog:
+        if (catalog := self.catalogs.get(semester)) is None:
+            sections = make_catalog(self.sections, self.events, seed=semester % 1000)
+            catalog = self.catalogs[semester] = Catalog(
+                sections,
+                [s.key for s in sections],
+                {s.reg_id: s for s in sections},
+            )
+        return catalog
+
+    def set_seats(self, semester: Semester, reg_id: str, seats: int) -> FakeSection:
+        section = self.catalog(semester).by_reg_id[reg_id]
+        self.update_seats(section, seats)
+        return section
+
+    def update_seats(self, section: FakeSection, seats: int):
+        if seats <= 0:
+            self.opened.pop(section.reg_id, None)
+        elif section.open_seats <= 0:
+            self.opened[section.reg_id] = time.monotonic()
+        section.open_seats = seats
+
+    async def churn_seats(self):
+        while True:
+            await asyncio.sleep(1 / self.churn)
+            if self.catalogs:
+                catalog = self.rng.choice(list(self.catalogs.values()))
+                section = self.rng.choice(catalog.sections)
+                self.update_seats(section, self.rng.choice((0, 0, 0, 1, 2, 5)))
+
+    def admit(self) -> bool:
+        if not self.throttle:
+            return True
+        now = time.monotonic()
+        self.tokens = min(
+            self.throttle, self.tokens + (now - self.refilled) * self.throttle
+        )
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def session_of(self, request: web.Request) -> FakeSession | None:
+        token = request.cookies.get(SESSION_COOKIE)
+        if (session := self.sessions.get(token)) is None:
+            return None
+        now = time.monotonic()
+        if self.session_ttl is not None and now - session.seen > self.session_ttl:
+            del self.sessions[token]
+            self.stats.expired += 1
+            return None
+        session.seen = now
+        return session
+
+    async def studentlink(self, request: web.Request) -> web.Response:
+        module = request.query.get("ModuleName", "")
+        params = {k: v for k, v in request.query.items() if k != "ModuleName"}
+        self.stats.requests[module] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+        if not self.admit():
+            self.stats.refused += 1
+            return html(pages.REFUSED)
+        if module != "bldg.pl" and (session := self.session_of(request)) is None:
+            self.executions += 1
+            raise web.HTTPFound(
+                URL(SSO).with_query(execution=f"e{self.executions}s1")
+            )
+        if self.corpus is not None and (page := self.corpus.get(module, params)):
+            return html(page)
+        match module:
+            case "bldg.pl":
+                return html(pages.bldg_page(params.get("BldgCd", "")))
+            case "regsched.pl":
+                return html(pages.regsched_page(self.registered[session.username]))
+            case "allsched.pl":
+                return html(pages.allsched_page(self.registered[session.username]))
+            case str(reg) if reg.startswith("reg/"):
+                return html(self.registration(session, module, params))
+        return html("<HTML><BODY>StudentLink</BODY></HTML>")
+
+    def registration(self, session: FakeSession, module: str, params: dict) -> str:
+        try:
+            semester = Semester.from_key(int(params["KeySem"]))
+        except (KeyError, ValueError):
+            return pages.ERROR
+        if module == "reg/option/_start.pl":
+            session.semester = semester
+            return pages.reg_option_page(semester)
+        # the only reg page that takes its semester from the query alone
+        if module == "reg/add/browse_schedule.pl":
+            return self.browse(self.catalog(semester), params)
+        if not self.reg_open or session.semester != semester:
+            return pages.UNAVAILABLE
+        catalog = self.catalog(semester)
+        registered = self.registered[session.username][semester]
+        planned = self.planned[session.username][semester]
+        match module:
+            case "reg/add/_start.pl":
+                return pages.add_page(sorted({s.college for s in catalog.sections}))
+            case "reg/add/confirm_classes.pl":
+                if (section := catalog.by_reg_id.get(params.get("SelectIt"))) is None:
+                    return pages.ERROR
+                if section in registered:
+                    result = (section, False, "Already registered")
+                elif section.open_seats <= 0:
+                    result = (section, False, "Class full")
+                else:
+                    if (opened := self.opened.pop(section.reg_id, None)) is not None:
+                        self.stats.grabs.append(time.monotonic() - opened)
+                    self.update_seats(section, section.open_seats - 1)
+                    registered.append(section)
+                    self.stats.registrations += 1
+                    result = (section, True, "Class added")
+                return pages.confirm_classes_page(semester, [result])
+            case "reg/drop/_start.pl":
+                return pages.drop_page(registered)
+            case "reg/drop/confirm_drop.pl":
+                if (section := catalog.by_reg_id.get(params.get("DropIt"))) is None:
+                    return pages.ERROR
+                if section not in registered:
+                    return pages.confirm_drop_page(
+                        semester, [(section, False, "Not registered")]
+                    )
+                registered.remove(section)
+                self.update_seats(section, section.open_seats + 1)
+                return pages.confirm_drop_page(semester, [(section, True, "Dropped")])
+            case "reg/plan/_start.pl":
+                return pages.plan_page(semester, planned)
+            case "reg/plan/add_planner.pl":
+                if (section := catalog.by_reg_id.get(params.get("SelectIt"))) is None:
+                    return pages.ERROR
+                if section not in planned:
+                    planned.append(section)
+                return pages.plan_page(semester, planned)
+            case "reg/section/_start.pl":
+                return pages.section_page(semester, registered)
+        return pages.reg_option_page(semester)
+
+    def browse(self, catalog: Catalog, params: dict) -> str:
+        # a page of sections starting at the query, like the "start at"
+        # search; the next query picks up where the page ends
+        key = tuple(params.get(k, "") for k in ("College", "Dept", "Course", "Section"))
+        start = bisect_left(catalog.keys, key)
+        sections = catalog.sections[start : start + self.page_size]
+        if not sections:
+            return pages.NO_CLASSES
+        end = start + self.page_size
+        return pages.browse_page(
+            sections, catalog.sections[end] if end < len(catalog.sections) else None
+        )
+
+    # shib
+
+    async def sso(self, request: web.Request) -> web.Response:
+        execution = request.query.get("execution", "e1s1")
+        csrf_token = secrets.token_hex(8)
+        if (username := self.shib_sessions.get(request.cookies.get(SHIB_COOKIE))) is None:
+            return html(pages.login_page(csrf_token))
+        # shib still knows the user, straight to duo
+        if (sid := request.query.get("sid")) is None or sid not in self.duo:
+            sid = self.transaction(username)
+            raise web.HTTPFound(URL(SSO).with_query(execution=execution, sid=sid))
+        duo = self.duo[sid]
+        return html(pages.duo_page(csrf_token, duo.tx, duo.xsrf, two_step=True))
+
+    async def simple_sign(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        username = form.get("j_username")
+        if username not in self.accounts or self.accounts[username] != form.get(
+            "j_password"
+        ):
+            return html(
+                pages.login_page(secrets.token_hex(8), "The credentials are incorrect.")
+            )
+        shib = secrets.token_hex(16)
+        self.shib_sessions[shib] = username
+        sid = self.transaction(username)
+        duo = self.duo[sid]
+        response = web.HTTPSeeOther(URL(FRAMELESS).with_query(sid=sid, tx=duo.tx))
+        response.set_cookie(SHIB_COOKIE, shib)
+        raise response
+
+    def transaction(self, username: str) -> str:
+        sid = secrets.token_hex(8)
+        self.duo[sid] = DuoTransaction(
+            username, f"TX|{secrets.token_hex(8)}", secrets.token_hex(8)
+        )
+        return sid
+
+    def saml_continue(self, username: str) -> web.Response:
+        assertion = secrets.token_hex(16)
+        self.assertions[assertion] = username
+        return html(
+            pages.saml_continue_page(
+                f"{STUDENTLINK}?ModuleName=allsched.pl", f"PHNhbWw+{assertion}"
+            )
+        )
+
+    async def duo_callback(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if (duo := self.duo.pop(request.query.get("sid", form.get("state")), None)) is None:
+            return html(pages.ERROR, status=400)
+        return self.saml_continue(duo.username)
+
+    async def assertion_consumer(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        assertion = form.get("SAMLResponse", "").removeprefix("PHNhbWw+")
+        if (username := self.assertions.pop(assertion, None)) is None:
+            return html(pages.ERROR, status=400)
+        token = secrets.token_hex(16)
+        self.sessions[token] = FakeSession(username)
+        self.stats.logins += 1
+        response = web.HTTPSeeOther(form.get("RelayState", STUDENTLINK))
+        response.set_cookie(SESSION_COOKIE, token)
+        raise response
+
+    # duo
+
+    def duo_of(self, sid: str | None) -> DuoTransaction:
+        if (duo := self.duo.get(sid)) is None:
+            raise web.HTTPBadRequest(text="unknown sid")
+        return duo
+
+    async def frameless(self, request: web.Request) -> web.Response:
+        duo = self.duo_of(request.query.get("sid"))
+        return html(pages.duo_page(secrets.token_hex(8), duo.tx, duo.xsrf))
+
+    async def frameless_auth(self, request: web.Request) -> web.Response:
+        sid = request.query.get("sid")
+        duo = self.duo_of(sid)
+        remembered = self.remembered.get(request.cookies.get(REMEMBER_COOKIE))
+        if not (self.duo_remembers and remembered == duo.username):
+            raise web.HTTPSeeOther(URL("/frame/v4/auth/prompt").with_query(sid=sid))
+        self.stats.remembered += 1
+        if self.remembered_branch == "redirect":
+            raise web.HTTPSeeOther(URL(DUO_CALLBACK).with_query(sid=sid))
+        return html(
+            pages.logging_in_page(DUO_CALLBACK, {"state": sid, "code": secrets.token_hex(8)})
+        )
+
+    async def prompt_page(self, request: web.Request) -> web.Response:
+        self.duo_of(request.query.get("sid"))
+        return html("<html><body>Choose an authentication method</body></html>")
+
+    async def prompt_data(self, request: web.Request) -> web.Response:
+        self.duo_of(request.query.get("sid"))
+        return web.json_response(
+            {"stat": "OK", "response": {"phones": [{"key": "DPFAKEPHONE1", "index": "phone1"}]}}
+        )
+
+    async def prompt(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        duo = self.duo_of(form.get("sid"))
+        duo.txid = secrets.token_hex(8)
+        self.stats.pushes += 1
+        return web.json_response({"stat": "OK", "response": {"txid": duo.txid}})
+
+    async def status(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        duo = self.duo_of(form.get("sid"))
+        if form.get("txid") != duo.txid:
+            return web.json_response({"stat": "FAIL", "response": {}})
+        duo.polls += 1
+        if duo.polls == 1:
+            return web.json_response(
+                {"stat": "OK", "response": {"status_code": "pushed"}}
+            )
+        # the second poll waits for the user to approve the push
+        await asyncio.sleep(self.push_delay)
+        duo.allowed = True
+        return web.json_response(
+            {"stat": "OK", "response": {"status_code": "allow", "result": "SUCCESS"}}
+        )
+
+    async def oidc_exit(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        sid = form.get("sid")
+        duo = self.duo_of(sid)
+        if not duo.allowed:
+            return html(pages.ERROR, status=400)
+        del self.duo[sid]
+        response = self.saml_continue(duo.username)
+        if self.duo_remembers:
+            device = secrets.token_hex(16)
+            self.remembered[device] = duo.username
+            response.set_cookie(REMEMBER_COOKIE, device)
+        return response
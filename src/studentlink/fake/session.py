@@ -0,0 +1,59 @@
+from __future__ import annotations
+from yarl import URL
+import aiohttp
+import socket
+
+# every host the client and its login flow talk to
+REMOTE_HOSTS = ("www.bu.edu", "shib.bu.edu", "linklogin.bu.edu")
+REMOTE_DOMAINS = (".duosecurity.com",)
+
+
+class LocalSession:
+    # a ClientSession that sends requests for the live hosts to a FakeServer
+    # instead, keeping path and query. a wrapper rather than a subclass, which
+    # aiohttp deprecates
+    def __init__(self, base_url: str | URL, **kwargs):
+        self.base_url = URL(base_url)
+        # the server only listens on IPv4, don't try ::1 for localhost first
+        kwargs.setdefault("connector", aiohttp.TCPConnector(family=socket.AF_INET))
+        self.session = aiohttp.ClientSession(**kwargs)
+
+    def local(self, url: str | URL) -> URL:
+        url = URL(url)
+        if url.host not in REMOTE_HOSTS and not (url.host or "").endswith(
+            REMOTE_DOMAINS
+        ):
+            return url
+        return URL.build(
+            scheme=self.base_url.scheme,
+            host=self.base_url.host,
+            port=self.base_url.port,
+            path=url.raw_path,
+            query_string=url.raw_query_string,
+            encoded=True,
+        )
+
+    def request(self, method: str, url: str | URL, **kwargs):
+        return self.session.request(method, self.local(url), **kwargs)
+
+    def get(self, url: str | URL, **kwargs):
+        return self.session.get(self.local(url), **kwargs)
+
+    def post(self, url: str | URL, **kwargs):
+        return self.session.post(self.local(url), **kwargs)
+
+    def head(self, url: str | URL, **kwargs):
+        return self.session.head(self.local(url), **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+    async def __aenter__(self):
+        await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.session.__aexit__(*args)
+
+    async def close(self):
+        await self.session.close()
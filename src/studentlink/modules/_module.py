@@ -1,13 +1,26 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Awaitable, Callable, Hashable, TypeVar
+from bs4 import BeautifulSoup
 from yarl import URL
+from studentlink.scheduler import Priority
 
 if TYPE_CHECKING:
     from studentlink import StudentLink
 
+T = TypeVar("T")
+
 
 class Module(ABC):
+    # modules whose requests have side effects set this to False so that
+    # concurrent identical requests are not merged into one
+    IDEMPOTENT = True
+    # None uses the lane of the calling context, see scheduler.priority()
+    PRIORITY: Priority = None
+    # whether pages differ between accounts, which limits the sessions a
+    # SessionPool can send a call to
+    ACCOUNT_SPECIFIC = True
+
     @property
     @abstractmethod
     def MODULE_NAME(self):
@@ -16,17 +29,41 @@ class Module(ABC):
     def __init__(self, client: StudentLink):
         self.client = client
 
+    @property
+    def persistent_cache(self):
+        return self.client.persistent_cache
+
     @staticmethod
     def mod_url(module: str):
         return URL("https://www.bu.edu/link/bin/uiscgi_studentlink.pl").with_query(
             ModuleName=module
         )
 
-    async def get_page(self, *, params: dict[str, str] = None) -> str:
+    async def get_page(
+        self,
+        *,
+        params: dict[str, str] = None,
+        after_login: Callable[[], Awaitable] = None,
+    ) -> str:
         return await self.client.get_page(
-            Module.mod_url(self.MODULE_NAME), params=params
+            Module.mod_url(self.MODULE_NAME),
+            params=params,
+            coalesce=self.IDEMPOTENT,
+            priority=self.PRIORITY,
+            after_login=after_login,
         )
 
+    async def parse(
+        self,
+        page: str,
+        parse: Callable[[BeautifulSoup, str], T],
+        *,
+        key: Hashable = None,
+        region: str = None,
+    ) -> T:
+        # results are only cached when a key identifying the request is given
+        return await self.client.parse(page, parse, key=key, region=region)
+
 
 class PublicModule(Module, ABC):
-    ...
+    ACCOUNT_SPECIFIC = False
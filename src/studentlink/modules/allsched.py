@@ -1,12 +1,11 @@
 from ._module import Module
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from bs4 import BeautifulSoup
 import re
-import asyncio
 from studentlink.util import normalize, Abbr, PageParseError
-from studentlink.data.class_ import ScheduleClassView, Weekday, Event, Building
+from studentlink.parser import decode_events
+from studentlink.data.class_ import ScheduleClassView, Event
 from studentlink.modules.bldg import Bldg
-from datetime import datetime
 from bs4.element import Tag
 
 
@@ -15,7 +14,13 @@ class AllSched(Module):
 
     async def get_schedule(self, populate_buildings: bool = False):
         page = await self.get_page()
-        soup = BeautifulSoup(page, "html5lib")
+        result = await self.parse(page, self._parse_schedule, key=())
+        if populate_buildings:
+            result = await self.populate_buildings(result)
+        return result
+
+    @staticmethod
+    def _parse_schedule(soup: BeautifulSoup, page: str):
         # probably fails if there are no classes
         data_rows: list[Tag]
         try:
@@ -88,7 +93,7 @@ class AllSched(Module):
                     Tag(name="td", text=notes),
                 ]:
                     result[semester].append(
-                        self.create_schedule_class_view(
+                        AllSched.create_schedule_class_view(
                             semester,
                             abbreviation,
                             status,
@@ -103,18 +108,16 @@ class AllSched(Module):
                             events_days,
                             events_starts,
                             events_stops,
-                            populate_buildings,
                         )
                     )
                 case [Tag(name="td", text="no\xa0reg\xa0activity"), *_]:
                     continue
                 case _:
                     raise PageParseError(f"Invalid row: \n{tr}\nin page:\n{page}")
-        result = {k: await asyncio.gather(*v) for k, v in result.items()}
         return result
 
-    async def create_schedule_class_view(
-        self,
+    @staticmethod
+    def create_schedule_class_view(
         semester,
         abbreviation,
         status,
@@ -129,45 +132,14 @@ class AllSched(Module):
         events_days,
         events_starts,
         events_stops,
-        populate_buildings: bool = False,
     ):
-        schedule = []
-        for building, room, days, start, stop in zip(
+        schedule = decode_events(
             events_buildings,
             events_rooms,
             events_days,
             events_starts,
             events_stops,
-        ):
-            match building, room:
-                case Tag(name="a", text=abbr), _:
-                    building = (
-                        Building(abbreviation=abbr)
-                        if not populate_buildings
-                        else await self.client.module(Bldg).get_building(abbr)
-                    )
-                    room = normalize(room).split("\n")[0]
-                case "NO", "ROOM":
-                    building = room = None
-                case Tag(name="br"), Tag(name="br"):  # skip line breaks
-                    continue
-                case _:
-                    raise PageParseError(
-                        f"Invalid building or room: {building}, {room}"
-                    )
-            days = [Weekday[day] for day in days.split(",")]
-            start = datetime.strptime(normalize(start), "%I:%M%p").time()
-            stop = datetime.strptime(normalize(stop), "%I:%M%p").time()
-            schedule += [
-                Event(
-                    building=building,
-                    room=room,
-                    day=day,
-                    start=start,
-                    stop=stop,
-                )
-                for day in days
-            ]
+        )
         return ScheduleClassView(
             abbr=Abbr(normalize(abbreviation)),
             semester=semester,
@@ -180,3 +152,36 @@ class AllSched(Module):
             schedule=schedule,
             notes=normalize(notes),
         )
+
+    async def populate_buildings(
+        self, result: dict[str, list[ScheduleClassView]]
+    ) -> dict[str, list[ScheduleClassView]]:
+        # look every distinct building up once, concurrently, before rebuilding
+        buildings = await self.client.module(Bldg).get_buildings(
+            event.building.abbreviation
+            for cvs in result.values()
+            for cv in cvs
+            for event in cv.schedule
+            if event.building
+        )
+        return {
+            semester: [
+                replace(
+                    cv,
+                    schedule=tuple(
+                        Event.of(
+                            event.day,
+                            event.start,
+                            event.stop,
+                            buildings[event.building.abbreviation],
+                            event.room,
+                        )
+                        if event.building
+                        else event
+                        for event in cv.schedule
+                    ),
+                )
+                for cv in cvs
+            ]
+            for semester, cvs in result.items()
+        }
@@ -1,21 +1,39 @@
 from ._module import PublicModule
 from studentlink.data.class_ import Building
-from studentlink.util import async_ttl_cache
+from studentlink.cache import async_cache
+from typing import Iterable
+import asyncio
 import re
 
 
 class Bldg(PublicModule):
     MODULE_NAME = "bldg.pl"
     REFRESH_EVERY_SECONDS = 3600
-    
-    @async_ttl_cache(REFRESH_EVERY_SECONDS)
+    PERSIST_FOR_SECONDS = 60 * 60 * 24 * 7
+    MAX_CONCURRENT_REQUESTS = 8
+
+    @async_cache(
+        REFRESH_EVERY_SECONDS, persistent=True, persistent_ttl=PERSIST_FOR_SECONDS
+    )
     async def get_building(self, abbr: str) -> Building:
         page = await self.get_page(params={"BldgCd": abbr})
         abbr, desc, addr = re.findall(
             r"(?:Abbreviation|Description|Address):\n.+<TD ALIGN=left>(.+)\n", page
         )
-        return Building(
+        return Building.of(
             abbreviation=abbr,
             description=desc,
             address=addr,
-        )
\ No newline at end of file
+        )
+
+    async def get_buildings(
+        self, abbrs: Iterable[str], max_concurrent: int = None
+    ) -> dict[str, Building]:
+        abbrs = list(dict.fromkeys(abbrs))
+        semaphore = asyncio.Semaphore(max_concurrent or self.MAX_CONCURRENT_REQUESTS)
+
+        async def get_building(abbr: str):
+            async with semaphore:
+                return await self.get_building(abbr)
+
+        return dict(zip(abbrs, await asyncio.gather(*map(get_building, abbrs))))
@@ -1,15 +1,20 @@
+from __future__ import annotations
 from ._module import Module
 from dataclasses import dataclass
+from typing import AsyncIterator
+import asyncio
 from bs4 import BeautifulSoup
 import re
 from studentlink.util import normalize, Semester, Abbr, PageParseError
-from studentlink.data.class_ import ClassView, Weekday, Event, Building
-from datetime import datetime
+from studentlink.parser import table_rows, decode_events
+from studentlink.scheduler import DISPATCHED
+from studentlink.data.class_ import ClassView
 from bs4.element import Tag
 
 
 class BrowseSchedule(Module):
     MODULE_NAME = "reg/add/browse_schedule.pl"
+    ACCOUNT_SPECIFIC = False
 
     async def search_class(
         self,
@@ -20,6 +25,84 @@ class BrowseSchedule(Module):
         section: str = None,
         include_next_query: bool = False,
     ):
+        params = self.search_params(semester, college, department, course, section)
+        page = await self.get_page(params=params)
+        if include_next_query:
+            return await self.parse_class_list(page, params), self.next_query(page)
+        return await self.parse_class_list(page, params)
+
+    async def iter_pages(
+        self,
+        semester: Semester,
+        college: str,
+        department: str = None,
+        course: int | str = None,
+        section: str = None,
+        *,
+        within_college: bool = False,
+    ) -> AsyncIterator[tuple[list[RegClassView], list[str] | None]]:
+        # every page of the listing from the query on, with its next query.
+        # the next page is requested before this one is parsed, so the two
+        # overlap; stopping the iteration drops the request for it. with
+        # within_college the listing ends where the next college starts,
+        # without a request for its first page
+        params = self.search_params(semester, college, department, course, section)
+        fetch = asyncio.create_task(self.get_page(params=params))
+        try:
+            while fetch is not None:
+                page = await fetch
+                next_query = self.next_query(page)
+                if within_college and next_query is not None and next_query[0] != college:
+                    next_query = None
+                fetch = None
+                if next_query is not None:
+                    dispatched = asyncio.get_running_loop().create_future()
+                    token = DISPATCHED.set(dispatched)
+                    try:  # the task gets a copy of the context
+                        fetch = asyncio.create_task(
+                            self.get_page(
+                                params=self.search_params(semester, *next_query)
+                            )
+                        )
+                    finally:
+                        DISPATCHED.reset(token)
+                    # a parse on the loop would hold the request back, so it
+                    # goes out first; a fetch that ends without sending one
+                    # (an error, or one that joined a request in flight) ends
+                    # the wait as well
+                    await asyncio.wait(
+                        (dispatched, fetch), return_when=asyncio.FIRST_COMPLETED
+                    )
+                yield await self.parse_class_list(page, params), next_query
+                if next_query is not None:
+                    params = self.search_params(semester, *next_query)
+        finally:
+            if fetch is not None:
+                fetch.cancel()
+                await asyncio.gather(fetch, return_exceptions=True)
+
+    async def iter_classes(
+        self,
+        semester: Semester,
+        college: str,
+        department: str = None,
+        course: int | str = None,
+        section: str = None,
+    ) -> AsyncIterator[RegClassView]:
+        async for views, _ in self.iter_pages(
+            semester, college, department, course, section
+        ):
+            for view in views:
+                yield view
+
+    @staticmethod
+    def search_params(
+        semester: Semester,
+        college: str,
+        department: str = None,
+        course: int | str = None,
+        section: str = None,
+    ) -> dict[str, str]:
         params = {
             "SearchOptionCd": "S",
             "KeySem": semester,
@@ -28,31 +111,40 @@ class BrowseSchedule(Module):
         for k, v in zip(("Dept", "Course", "Section"), (department, course, section)):
             if v is not None:
                 params[k] = v
-        page = await self.get_page(params=params)
-        if include_next_query:
-            next_query = (
-                re.findall(
-                    r'<INPUT.*NAME="College".*VALUE="([A-Z]{3})".*onFocus="ClearCollege\(\);">',
-                    page,
-                )
-                + re.findall(r'<INPUT.*NAME="Dept".*VALUE="([A-Z]{2})".*>', page)
-                + re.findall(r'<INPUT.*NAME="Course".*VALUE="(\d+)".*>', page)
-                + re.findall(r'<INPUT.*NAME="Section".*VALUE="([A-Z\d]+)".*>', page)
+        return params
+
+    @staticmethod
+    def next_query(page: str) -> list[str] | None:
+        next_query = (
+            re.findall(
+                r'<INPUT.*NAME="College".*VALUE="([A-Z]{3})".*onFocus="ClearCollege\(\);">',
+                page,
             )
-            return self.parse_class_list(page), next_query or None
-        return self.parse_class_list(page)
+            + re.findall(r'<INPUT.*NAME="Dept".*VALUE="([A-Z]{2})".*>', page)
+            + re.findall(r'<INPUT.*NAME="Course".*VALUE="(\d+)".*>', page)
+            + re.findall(r'<INPUT.*NAME="Section".*VALUE="([A-Z\d]+)".*>', page)
+        )
+        return next_query or None
 
-    def parse_class_list(self, page: str):
+    async def parse_class_list(self, page: str, params: dict[str, str] = None):
         if "No classes found for specified search criteria" in page:
             return []
         if "Semester must be in format YYYYS" in page:
             raise ValueError("Invalid semester")
-        soup = BeautifulSoup(page, "html5lib")
+        return await self.parse(
+            page,
+            self._parse_class_list,
+            key=None if params is None else tuple(params.items()),
+            region="SelectForm",
+        )
+
+    @staticmethod
+    def _parse_class_list(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try:
-            _, *data_rows = soup.find(
-                name="form", attrs={"name": "SelectForm"}
-            ).tbody.find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find(name="form", attrs={"name": "SelectForm"}).find("table")
+            )
         except AttributeError:
             raise PageParseError(f"Failed to parse class browse page: {page}")
         result: list[RegClassView] = []
@@ -92,41 +184,13 @@ class BrowseSchedule(Module):
                             pass
                         case Tag(contents=[title]):
                             instructor = None
-                    schedule = []
-                    for building, room, days, start, stop in zip(
+                    schedule = decode_events(
                         events_buildings,
                         events_rooms,
                         events_days,
                         events_starts,
                         events_stops,
-                    ):
-                        match building, room:
-                            case "NO", "ROOM":
-                                building = room = None
-                            case Tag(name="br"), Tag(name="br"):
-                                continue
-                            case " ", " ":
-                                continue
-                            case str(), str():
-                                building = Building(abbreviation=normalize(building))
-                                room = normalize(room)
-                        days = [
-                            Weekday[day] for day in normalize(days).split(",") if day
-                        ]
-                        schedule += [
-                            Event(
-                                building=building,
-                                room=room,
-                                day=day,
-                                start=datetime.strptime(
-                                    normalize(start), "%I:%M%p"
-                                ).time(),
-                                stop=datetime.strptime(
-                                    normalize(stop), "%I:%M%p"
-                                ).time(),
-                            )
-                            for day in days
-                        ]
+                    )
                     result.append(
                         RegClassView(
                             abbr=Abbr(normalize(abbreviation)),
@@ -148,7 +212,7 @@ class BrowseSchedule(Module):
         return result
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class RegClassView(ClassView):
     reg_id: str = None
     open_seats: int = None
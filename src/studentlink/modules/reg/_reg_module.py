@@ -1,27 +1,85 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 from abc import ABC
+import asyncio
+import contextlib
+import time
 from studentlink.modules._module import Module
+from studentlink.scheduler import PRIORITY, priority
 from studentlink.util import Semester
-from studentlink.util import async_ttl_cache
 
 if TYPE_CHECKING:
     from studentlink import StudentLink
 
 
+UNAVAILABLE_OPTION = (
+    "You requested a registration option not available for the semester."
+)
+
+
 class RegOptions(Module):
     MODULE_NAME = "reg/option/_start.pl"
     REFRESH_EVERY_SECONDS = 60 * 60 * 2
-    cache = {}
+    # how long a freshly loaded context is trusted despite UNAVAILABLE_OPTION
+    RECHECK_EVERY_SECONDS = 60
 
     def __init__(self, client: StudentLink):
         super().__init__(client)
+        # the semester the server session currently has selected
+        self.semester: Semester = None
+        self.login_generation: int = None
+        self.loaded_at = 0.0
+        self.users = 0
+        self.condition = asyncio.Condition()
+
+    def is_current(self, semester: Semester) -> bool:
+        return (
+            self.semester == semester
+            and self.login_generation == self.client.login_generation
+            and time.monotonic() - self.loaded_at < self.REFRESH_EVERY_SECONDS
+        )
 
-    @async_ttl_cache(REFRESH_EVERY_SECONDS, cache=cache)
     async def load_semester(self, semester: Semester):
         page = await self.get_page(params={"KeySem": semester})
+        self.semester = semester
+        self.login_generation = self.client.login_generation
+        self.loaded_at = time.monotonic()
         return page
 
+    def needs_load(self, semester: Semester, stale: float = None) -> bool:
+        # stale is when a context found to be wrong was loaded; one loaded
+        # since then is trusted
+        return not self.is_current(semester) or (
+            stale is not None and self.loaded_at <= stale
+        )
+
+    @contextlib.asynccontextmanager
+    async def context(self, semester: Semester, *, stale: float = None):
+        # requests for the active semester run concurrently; switching to
+        # another one waits for them to finish so none sees the wrong context
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: self.users == 0 or not self.needs_load(semester, stale)
+            )
+            if self.needs_load(semester, stale):
+                await self.load_semester(semester)
+            self.users += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.users -= 1
+                self.condition.notify_all()
+
+    async def restore(self, semester: Semester):
+        # for requests holding the context of semester after a re-login made
+        # the server forget it. they all want that semester, so it's loaded
+        # again without waiting for them, by whichever gets here first
+        async with self.condition:
+            if not self.is_current(semester):
+                await self.load_semester(semester)
+
+
 class RegModule(Module, ABC):
     MODULE_NAME = None
 
@@ -32,9 +90,26 @@ class RegModule(Module, ABC):
         self, semester: Semester, *, params: dict[str, str] = None
     ) -> str:
         ro: RegOptions = self.client.module(RegOptions)
-        await ro.load_semester(semester)
-        # TODO refresh cache if fails
-        return await super().get_page(params={"KeySem": semester} | (params or {}))
+        params = {"KeySem": semester} | (params or {})
+        # switching the semester runs in the lane of the request it's for
+        with priority(self.PRIORITY if self.PRIORITY is not None else PRIORITY.get()):
+            async with ro.context(semester):
+                loaded_at = ro.loaded_at
+                page = await super().get_page(
+                    params=params, after_login=lambda: ro.restore(semester)
+                )
+            # the context may have been dropped by a login elsewhere, or the
+            # option be unavailable for a reason a fresh context fixes. the
+            # server did nothing either way, so writes are safe to resend
+            if UNAVAILABLE_OPTION in page and (
+                not ro.is_current(semester)
+                or time.monotonic() - loaded_at > ro.RECHECK_EVERY_SECONDS
+            ):
+                async with ro.context(semester, stale=loaded_at):
+                    page = await super().get_page(
+                        params=params, after_login=lambda: ro.restore(semester)
+                    )
+        return page
 
 
 class UnavailableOptionError(Exception):
@@ -1,15 +1,17 @@
 from studentlink.modules.reg._reg_module import RegModule
 from studentlink.util import normalize, Semester, Abbr, PageParseError
-from studentlink.util import async_ttl_cache
+from studentlink.cache import async_cache
 
 import re
 
 
 class Add(RegModule):
     MODULE_NAME = "reg/add/_start.pl"
-    
-    get_page_cached = async_ttl_cache(60)(RegModule.get_page)
+    PERSIST_FOR_SECONDS = 60 * 60 * 24
+
+    get_page_cached = async_cache(60)(RegModule.get_page)
 
+    @async_cache(60, persistent=True, persistent_ttl=PERSIST_FOR_SECONDS)
     async def get_college_codes(self, semester: Semester) -> list[str]:
         page = await self.get_page_cached(semester)
         college_select, = re.findall(r'<SELECT NAME=College onChange="ClearCollege\(\);">[\S\s]*?<\/SELECT>', page)
@@ -4,6 +4,7 @@ from studentlink.util import Semester
 
 class AddPlanner(RegModule):
     MODULE_NAME = "reg/plan/add_planner.pl"
+    IDEMPOTENT = False
 
     async def add_to_planner(self, semester: Semester, reg_id: str):
         page = await self.get_page(
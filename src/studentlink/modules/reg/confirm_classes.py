@@ -3,6 +3,8 @@ from studentlink.util import Semester
 from bs4 import BeautifulSoup
 import re
 from studentlink.util import normalize, Semester, PageParseError
+from studentlink.parser import table_rows
+from studentlink.scheduler import Priority
 from studentlink.data.class_ import ClassView, Weekday, Event, Building
 from datetime import datetime
 from bs4.element import Tag
@@ -10,6 +12,8 @@ from bs4.element import Tag
 
 class ConfirmClasses(RegModule):
     MODULE_NAME = "reg/add/confirm_classes.pl"
+    IDEMPOTENT = False
+    PRIORITY = Priority.CRITICAL
 
     async def confirm_class(self, semester: Semester, reg_id: str):
         page = await self.get_page(
@@ -21,14 +25,14 @@ class ConfirmClasses(RegModule):
             in page
         ):
             raise UnavailableOptionError("You requested a registration option not available for the semester.")
+        return await self.parse(page, self._parse_confirmation)
 
-        soup = BeautifulSoup(page, "html5lib")
+    @staticmethod
+    def _parse_confirmation(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try:
-            _, *data_rows = (
-                soup.find("b", text="Semester: ")
-                .find_next("table")
-                .tbody.find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find("b", text="Semester: ").find_next("table")
             )
         except AttributeError:
             raise PageParseError(f"Failed to parse register confirmation: {page}")
@@ -55,5 +59,6 @@ class ConfirmClasses(RegModule):
                         True if "checkmark" in status else False,
                         message,
                     )
-
+        if data_rows and not result:
+            raise PageParseError(f"Failed to parse register confirmation: {page}")
         return result
@@ -3,6 +3,8 @@ from studentlink.util import Semester
 from bs4 import BeautifulSoup
 import re
 from studentlink.util import normalize, Semester, PageParseError
+from studentlink.parser import table_rows
+from studentlink.scheduler import Priority
 from studentlink.data.class_ import ClassView, Weekday, Event, Building
 from datetime import datetime
 from bs4.element import Tag
@@ -10,6 +12,8 @@ from bs4.element import Tag
 
 class ConfirmDrop(RegModule):
     MODULE_NAME = "reg/drop/confirm_drop.pl"
+    IDEMPOTENT = False
+    PRIORITY = Priority.CRITICAL
 
     async def confirm_drop(self, semester: Semester, drop_id: str):
         page = await self.get_page(
@@ -21,14 +25,14 @@ class ConfirmDrop(RegModule):
             in page
         ):
             raise UnavailableOptionError()
+        return await self.parse(page, self._parse_confirmation)
 
-        soup = BeautifulSoup(page, "html5lib")
+    @staticmethod
+    def _parse_confirmation(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try:
-            _, *data_rows = (
-                soup.find("b", text="Semester:")
-                .find_next("table")
-                .tbody.find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find("b", text="Semester:").find_next("table")
             )
         except AttributeError:
             raise PageParseError(f"Failed to parse drop confirmation: {page}")
@@ -42,4 +46,6 @@ class ConfirmDrop(RegModule):
                     Tag(text=message)
                 ]:
                     result[abbreviation] = (True if status == "DRP-ST" else False, message)
+        if data_rows and not result:
+            raise PageParseError(f"Failed to parse drop confirmation: {page}")
         return result
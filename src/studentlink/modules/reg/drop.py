@@ -3,8 +3,8 @@ from dataclasses import dataclass
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 from studentlink.util import normalize, Semester, Abbr, PageParseError
-from studentlink.data.class_ import RegisteredClassView, Weekday, Event, Building
-from datetime import datetime
+from studentlink.parser import table_rows, decode_events
+from studentlink.data.class_ import RegisteredClassView
 
 
 class Drop(RegModule):
@@ -14,13 +14,16 @@ class Drop(RegModule):
         page = await self.get_page(semester)
         if "You requested a registration option not available for the semester." in page:
             raise UnavailableOptionError("You requested a registration option not available for the semester.")
-        soup = BeautifulSoup(page, "html5lib")
+        return await self.parse(
+            page, self._parse_drop_list, key=semester, region="SelectForm"
+        )
+
+    @staticmethod
+    def _parse_drop_list(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try: 
-            _, *data_rows = (
-                soup.find(name="form", attrs={"name": "SelectForm"})
-                .find_next("tbody")
-                .find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find(name="form", attrs={"name": "SelectForm"}).find_next("table")
             )
         except AttributeError:
             raise PageParseError(f"Failed to parse drop list: {page}")
@@ -45,35 +48,13 @@ class Drop(RegModule):
                             pass
                         case Tag(contents=[title]):
                             instructor = None
-                    schedule = []
-                    for building, room, days, start, stop in zip(
+                    schedule = decode_events(
                         events_buildings,
                         events_rooms,
                         events_days,
                         events_starts,
                         events_stops,
-                    ):
-                        match building, room:
-                            case "NO", "ROOM":
-                                building = room = None
-                            case Tag(name="br"), Tag(name="br"):
-                                continue
-                            case str(), str():
-                                building = Building(abbreviation=normalize(building))
-                                room = normalize(room)
-                        days = [Weekday[day] for day in normalize(days).split(",")]
-                        start = datetime.strptime(normalize(start), "%I:%M%p").time()
-                        stop = datetime.strptime(normalize(stop), "%I:%M%p").time()
-                        schedule += [
-                            Event(
-                                building=building,
-                                room=room,
-                                day=day,
-                                start=start,
-                                stop=stop,
-                            )
-                            for day in days
-                        ]
+                    )
                     result.append(
                         DropClassView(
                             abbr=Abbr(normalize(abbreviation)),
@@ -93,6 +74,6 @@ class Drop(RegModule):
                     raise PageParseError(f"Failed to parse drop list: {page}")
         return result
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class DropClassView(RegisteredClassView):
     drop_id: str = None
\ No newline at end of file
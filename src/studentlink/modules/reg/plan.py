@@ -3,8 +3,8 @@ from dataclasses import dataclass
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 from studentlink.util import normalize, Semester, Abbr, PageParseError
-from studentlink.data.class_ import ClassView, Weekday, Event, Building
-from datetime import datetime
+from studentlink.parser import table_rows, decode_events
+from studentlink.data.class_ import ClassView
 
 
 class Plan(RegModule):
@@ -12,13 +12,16 @@ class Plan(RegModule):
 
     async def get_planner(self, semester: Semester):
         page = await self.get_page(semester)
-        soup = BeautifulSoup(page, "html5lib")
+        return await self.parse(
+            page, self._parse_planner, key=semester, region="Semester:"
+        )
+
+    @staticmethod
+    def _parse_planner(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try:
-            _, *data_rows = (
-                soup.find("b", text="Semester:")
-                .find_next("table")
-                .tbody.find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find("b", text="Semester:").find_next("table")
             )
         except AttributeError:
             raise PageParseError(f"Failed to parse planner: {page}")
@@ -56,35 +59,13 @@ class Plan(RegModule):
                             pass
                         case Tag(contents=[title]):
                             instructor = None
-                    schedule = []
-                    for building, room, days, start, stop in zip(
+                    schedule = decode_events(
                         events_buildings,
                         events_rooms,
                         events_days,
                         events_starts,
                         events_stops,
-                    ):
-                        match building, room:
-                            case "NO", "ROOM":
-                                building = room = None
-                            case Tag(name="br"), Tag(name="br"):
-                                continue
-                            case str(), str():
-                                building = Building(abbreviation=normalize(building))
-                                room = normalize(room)
-                        days = [Weekday[day] for day in normalize(days).split(",")]
-                        start = datetime.strptime(normalize(start), "%I:%M%p").time()
-                        stop = datetime.strptime(normalize(stop), "%I:%M%p").time()
-                        schedule += [
-                            Event(
-                                building=building,
-                                room=room,
-                                day=day,
-                                start=start,
-                                stop=stop,
-                            )
-                            for day in days
-                        ]
+                    )
                     result.append(
                         PlannerClassView(
                             abbr=Abbr(normalize(abbreviation)),
@@ -104,6 +85,6 @@ class Plan(RegModule):
                     raise PageParseError(f"Failed to parse planner: {page}")
         return result
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class PlannerClassView(ClassView):
     open_seats: int = None
\ No newline at end of file
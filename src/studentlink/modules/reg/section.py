@@ -3,19 +3,24 @@ from dataclasses import dataclass
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 from studentlink.util import normalize, Semester, Abbr, PageParseError
-from studentlink.data.class_ import RegisteredClassView, Weekday, Event, Building
-from datetime import datetime
+from studentlink.parser import table_rows, decode_events
+from studentlink.data.class_ import RegisteredClassView
 
 class Section(RegModule):
     MODULE_NAME = "reg/section/_start.pl"
     
     async def get_section_change(self, semester: Semester):
         page = await self.get_page(semester)
-        soup = BeautifulSoup(page, "html5lib")
+        return await self.parse(
+            page, self._parse_section_change, key=semester, region="Semester:"
+        )
+
+    @staticmethod
+    def _parse_section_change(soup: BeautifulSoup, page: str):
         data_rows: list[Tag]
         try:
-            _, *data_rows = (
-                soup.find("th", text="Semester:").find_next("table").tbody.find_all("tr", recursive=False)
+            _, *data_rows = table_rows(
+                soup.find("th", text="Semester:").find_next("table")
             )
         except AttributeError:
             raise PageParseError(f"Failed to parse section change: {page}")
@@ -48,35 +53,13 @@ class Section(RegModule):
                             can_switch = True
                         case Tag(text = abbreviation):
                             can_switch = False
-                    schedule = []
-                    for building, room, days, start, stop in zip(
+                    schedule = decode_events(
                         events_buildings,
                         events_rooms,
                         events_days,
                         events_starts,
                         events_stops,
-                    ):
-                        match building, room:
-                            case "NO", "ROOM":
-                                building = room = None
-                            case Tag(name="br"), Tag(name="br"):
-                                continue
-                            case str(), str():
-                                building = Building(abbreviation=normalize(building))
-                                room = normalize(room)
-                        days = [Weekday[day] for day in normalize(days).split(",")]
-                        start = datetime.strptime(normalize(start), "%I:%M%p").time()
-                        stop = datetime.strptime(normalize(stop), "%I:%M%p").time()
-                        schedule += [
-                            Event(
-                                building=building,
-                                room=room,
-                                day=day,
-                                start=start,
-                                stop=stop,
-                            )
-                            for day in days
-                        ]
+                    )
                     result.append(
                         SectionClassView(
                             abbr=Abbr(normalize(abbreviation)),
@@ -95,6 +78,6 @@ class Section(RegModule):
                     raise PageParseError(f"Failed to parse section change: {page}")
         return result
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class SectionClassView(RegisteredClassView):
     can_switch: bool = None
\ No newline at end of file
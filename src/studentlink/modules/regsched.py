@@ -2,8 +2,8 @@ from ._module import Module
 from bs4 import BeautifulSoup
 import re
 from studentlink.util import normalize, Abbr, PageParseError
-from studentlink.data.class_ import ScheduleClassView, Weekday, Event, Building
-from datetime import datetime
+from studentlink.parser import decode_events
+from studentlink.data.class_ import ScheduleClassView
 from bs4.element import Tag
 
 class RegSched(Module):
@@ -11,7 +11,10 @@ class RegSched(Module):
     
     async def get_schedule(self):
         page = await self.get_page()
-        soup = BeautifulSoup(page, "html5lib")
+        return await self.parse(page, self._parse_schedule, key=())
+
+    @staticmethod
+    def _parse_schedule(soup: BeautifulSoup, page: str):
         # probably fails if there are no classes
         data_rows: list[Tag]
         try:
@@ -64,34 +67,13 @@ class RegSched(Module):
                             pass
                         case Tag(contents=[title]):
                             instructor = None
-                    schedule = []
-                    for building, room, days, start, stop in zip(
-                        event_buildings, 
+                    schedule = decode_events(
+                        event_buildings,
                         event_rooms,
                         events_days,
                         event_starts,
-                        event_stops
-                    ):
-                        match building, room:
-                            case "NO", "ROOM":
-                                building = room = None
-                            case Tag(name="br"), Tag(name="br"):
-                                continue
-                            case str(), str():
-                                building = Building(abbreviation=normalize(building))
-                                room = normalize(room)
-                        days = [Weekday[day] for day in normalize(days).split(",")]
-                        start = datetime.strptime(normalize(start), "%I:%M%p").time()
-                        stop = datetime.strptime(normalize(stop), "%I:%M%p").time()
-                        schedule += [
-                            Event(
-                                building=building,
-                                room=room,
-                                day=day,
-                                start=start,
-                                stop=stop
-                            ) for day in days
-                        ]
+                        event_stops,
+                    )
                     result[semester].append(
                         ScheduleClassView(
                             abbr=Abbr(normalize(abbreviation)),
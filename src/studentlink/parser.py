@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import Callable, Hashable, TypeVar
+from collections import OrderedDict
+from datetime import datetime, time
+from functools import lru_cache
+import hashlib
+import re
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+from studentlink.util import normalize, PageParseError
+from studentlink.data.class_ import Weekday, Event, Building
+
+T = TypeVar("T")
+
+FAST_PARSER = "lxml"
+FALLBACK_PARSER = "html5lib"
+
+
+def parse_page(
+    page: str,
+    parse: Callable[[BeautifulSoup, str], T],
+    parser: str = FAST_PARSER,
+) -> T:
+    try:
+        return parse(BeautifulSoup(page, parser), page)
+    except PageParseError:
+        if parser == FALLBACK_PARSER:
+            raise
+        # lxml is less forgiving of studentlink's broken markup than html5lib
+        return parse(BeautifulSoup(page, FALLBACK_PARSER), page)
+
+
+# parts of a page that change between otherwise identical responses
+VOLATILE = re.compile(r"uiscgi_studentlink\.pl/\d+")
+
+
+def page_digest(page: str, region: str = None) -> bytes:
+    # region is a marker where the interesting part of the page starts
+    if region and (start := page.find(region)) != -1:
+        page = page[start:]
+    return hashlib.blake2b(
+        VOLATILE.sub("", page).encode(), digest_size=16
+    ).digest()
+
+
+def copy_result(result: T) -> T:
+    # views are immutable, only the containers holding them need copying
+    if isinstance(result, dict):
+        return {k: copy_result(v) for k, v in result.items()}
+    if isinstance(result, list):
+        return list(result)
+    return result
+
+
+class ParseCache:
+    # remembers the last result per key along with the digest of the page it
+    # was parsed from, so an unchanged page costs a hash instead of a parse
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[Hashable, tuple[bytes, object]] = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key: Hashable, digest: bytes):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != digest:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return copy_result(entry[1])
+
+    def put(self, key: Hashable, digest: bytes, result):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = (digest, copy_result(result))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def table_rows(table: Tag) -> list[Tag]:
+    # html5lib always inserts a <tbody>, lxml only keeps one that is in the page
+    return (table.find("tbody", recursive=False) or table).find_all(
+        "tr", recursive=False
+    )
+
+
+def _build_time_table() -> dict[str, time]:
+    table = {}
+    for minutes in range(24 * 60):
+        t = time(minutes // 60, minutes % 60)
+        hour = t.hour % 12 or 12
+        meridiem = "am" if t.hour < 12 else "pm"
+        for h in (f"{hour:02d}", str(hour)):
+            table[f"{h}:{t.minute:02d}{meridiem}"] = t
+    return table
+
+
+TIMES = _build_time_table()
+
+
+def decode_time(text: str) -> time:
+    text = normalize(text)
+    try:
+        return TIMES[text.lower()]
+    except KeyError:
+        return datetime.strptime(text, "%I:%M%p").time()
+
+
+@lru_cache(maxsize=256)
+def decode_days(text: str) -> tuple[Weekday, ...]:
+    return tuple(Weekday[day] for day in text.split(",") if day)
+
+
+def decode_events(
+    events_buildings: list,
+    events_rooms: list,
+    events_days: list,
+    events_starts: list,
+    events_stops: list,
+) -> tuple[Event, ...]:
+    # cache keys must be plain strs: NavigableStrings would keep their soup alive
+    schedule = []
+    for building, room, days, start, stop in zip(
+        events_buildings,
+        events_rooms,
+        events_days,
+        events_starts,
+        events_stops,
+    ):
+        match building, room:
+            case "NO", "ROOM":
+                building = room = None
+            case Tag(name="br"), Tag(name="br"):  # skip line breaks
+                continue
+            case " ", " ":
+                continue
+            case Tag(name="a", text=abbr), _:
+                building = Building.of(normalize(abbr))
+                room = normalize(room).split("\n")[0]
+            case str(), str():
+                building = Building.of(normalize(building))
+                room = normalize(room)
+            case _:
+                raise PageParseError(f"Invalid building or room: {building}, {room}")
+        start, stop = decode_time(start), decode_time(stop)
+        schedule += [
+            Event.of(day, start, stop, building, room)
+            for day in decode_days(normalize(days))
+        ]
+    return tuple(schedule)
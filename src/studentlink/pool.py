@@ -0,0 +1,215 @@
+from __future__ import annotations
+from collections import Counter
+from typing import AsyncIterator, Callable, TypeVar
+import asyncio
+import contextlib
+import inspect
+import itertools
+import logging
+import os
+
+from . import EXECUTORS, LoginError, StudentLinkAuth
+from .cache import AsyncCachedFunction, SQLiteCache
+from .modules._module import Module
+from .ratelimit import RateLimits
+
+M = TypeVar("M", bound=Module)
+
+ROUTING = ("least-loaded", "round-robin")
+
+
+class PooledModule:
+    # stands in for a module; every coroutine or async generator method call
+    # is routed by the pool to one of its sessions
+    def __init__(self, pool: SessionPool, module: type[Module], account: str):
+        self.pool = pool
+        self.module = module
+        self.account = account
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.module, name)
+        if inspect.isasyncgenfunction(attr):
+
+            def iterate(*args, **kwargs):
+                return self.pool.iterate(self.module, self.account, name, args, kwargs)
+
+            return iterate
+        if not (
+            inspect.iscoroutinefunction(attr) or isinstance(attr, AsyncCachedFunction)
+        ):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.pool.call(self.module, self.account, name, args, kwargs)
+
+        return call
+
+
+class SessionPool:
+    # keeps several logged-in sessions, for one or more accounts. reads are
+    # spread over every session that may serve them, writes always go to the
+    # first session of the account so server-side state stays in one place
+    def __init__(
+        self,
+        accounts: dict[str, str],
+        sessions_per_account: int = 2,
+        *,
+        routing: str = "least-loaded",
+        cookie_dir: str = None,
+        logger: logging.Logger = None,
+        **kwargs,
+    ):
+        if routing not in ROUTING:
+            raise ValueError(f"routing must be one of {ROUTING}")
+        self.accounts = accounts
+        self.sessions_per_account = sessions_per_account
+        self.routing = routing
+        self.cookie_dir = cookie_dir
+        self.logger = logger or logging.getLogger(__name__)
+        # every session talks to the same servers, so they share one budget
+        kwargs.setdefault("rate_limits", RateLimits())
+        # and one executor and persistent cache, owned by the pool
+        self.executor = self.persistent_cache = None
+        if isinstance(executor := kwargs.get("executor"), str):
+            self.executor = kwargs["executor"] = EXECUTORS[executor](
+                kwargs.pop("executor_workers", None)
+            )
+        if isinstance(path := kwargs.get("persistent_cache"), str):
+            self.persistent_cache = kwargs["persistent_cache"] = SQLiteCache(path)
+        self.kwargs = kwargs
+        self.sessions: dict[str, list[StudentLinkAuth]] = {}
+        self.load: Counter[StudentLinkAuth] = Counter()
+        self.calls: Counter[StudentLinkAuth] = Counter()
+        self.counter = itertools.count()
+        self.indices = itertools.count()
+        self.replacing: set[StudentLinkAuth] = set()
+        self.retiring: set[asyncio.Task] = set()
+        self.replaced = 0
+
+    async def __aenter__(self):
+        for username in self.accounts:
+            self.sessions[username] = [
+                await self.new_session(username)
+                for _ in range(self.sessions_per_account)
+            ]
+        return self
+
+    async def __aexit__(self, *args):
+        await asyncio.gather(*self.retiring)
+        for session in self.all_sessions():
+            await session.__aexit__(*args)
+        self.sessions = {}
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
+
+    async def new_session(self, username: str) -> StudentLinkAuth:
+        kwargs = dict(self.kwargs)
+        if self.cookie_dir is not None:
+            kwargs["cookie_path"] = os.path.join(
+                self.cookie_dir, f"{username}-{next(self.indices)}.pickle"
+            )
+        session = StudentLinkAuth(
+            username, self.accounts[username], logger=self.logger, **kwargs
+        )
+        return await session.__aenter__()
+
+    async def authenticate(self):
+        # logs every session in up front instead of on its first call
+        await asyncio.gather(
+            *(
+                session.get_page(Module.mod_url(session.KEEPALIVE_MODULE))
+                for session in self.all_sessions()
+            )
+        )
+
+    def all_sessions(self) -> list[StudentLinkAuth]:
+        return [session for sessions in self.sessions.values() for session in sessions]
+
+    def module(self, module: Callable[..., M], account: str = None) -> M:
+        if account is None:
+            account = next(iter(self.accounts))
+        if account not in self.accounts:
+            raise KeyError(f"unknown account {account}")
+        return PooledModule(self, module, account)
+
+    def route(self, module: type[Module], account: str) -> StudentLinkAuth:
+        if not module.IDEMPOTENT:
+            return self.sessions[account][0]
+        candidates = (
+            self.sessions[account] if module.ACCOUNT_SPECIFIC else self.all_sessions()
+        )
+        if self.routing == "round-robin":
+            return candidates[next(self.counter) % len(candidates)]
+        # ties go to the session used least so far, i.e. round-robin
+        return min(candidates, key=lambda s: (self.load[s], self.calls[s]))
+
+    async def call(self, module: type[Module], account: str, name: str, args, kwargs):
+        # an idempotent call gets one retry on a fresh session if its session
+        # can't log in anymore
+        for attempt in range(1 if not module.IDEMPOTENT else 2):
+            session = self.route(module, account)
+            self.load[session] += 1
+            self.calls[session] += 1
+            try:
+                return await getattr(session.module(module), name)(*args, **kwargs)
+            except LoginError:
+                await self.replace(session)
+                if attempt or not module.IDEMPOTENT:
+                    raise
+            finally:
+                self.load[session] -= 1
+
+    async def iterate(
+        self, module: type[Module], account: str, name: str, args, kwargs
+    ) -> AsyncIterator:
+        # like call, but the whole iteration stays on one session and counts
+        # as its load; the retry only applies before anything was yielded
+        for attempt in range(1 if not module.IDEMPOTENT else 2):
+            session = self.route(module, account)
+            self.load[session] += 1
+            self.calls[session] += 1
+            started = False
+            try:
+                async with contextlib.aclosing(
+                    getattr(session.module(module), name)(*args, **kwargs)
+                ) as items:
+                    async for item in items:
+                        started = True
+                        yield item
+                return
+            except LoginError:
+                await self.replace(session)
+                if attempt or started or not module.IDEMPOTENT:
+                    raise
+            finally:
+                self.load[session] -= 1
+
+    async def replace(self, session: StudentLinkAuth):
+        if session in self.replacing:  # a concurrent call got here first
+            return
+        for username, sessions in self.sessions.items():
+            if session in sessions:
+                break
+        else:
+            return
+        self.logger.warning(f"replacing a session of {username} that failed to log in")
+        self.replacing.add(session)
+        try:
+            replacement = await self.new_session(username)
+        finally:
+            self.replacing.discard(session)
+        sessions[sessions.index(session)] = replacement
+        self.replaced += 1
+        task = asyncio.create_task(self.retire(session))
+        self.retiring.add(task)
+        task.add_done_callback(self.retiring.discard)
+
+    async def retire(self, session: StudentLinkAuth):
+        # closes a replaced session once the calls still using it are done
+        while self.load[session] > 0:
+            await asyncio.sleep(0.1)
+        del self.load[session], self.calls[session]
+        with contextlib.suppress(Exception):
+            await session.__aexit__(None, None, None)
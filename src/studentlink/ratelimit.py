@@ -0,0 +1,142 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from yarl import URL
+import asyncio
+import heapq
+import itertools
+import time
+from .scheduler import Priority
+
+
+@dataclass
+class RateLimitStats:
+    requests: int = 0
+    refusals: int = 0
+    # refusals that actually lowered the rate; the rest were sent before the
+    # last cut and say nothing new about the current rate
+    cuts: int = 0
+    waited: float = 0
+
+
+class RateLimiter:
+    # token bucket whose refill rate is tuned AIMD-style. a host starts out
+    # unpaced (rate None) and is only paced once it refuses a request: a
+    # refusal multiplies the rate by decrease (starting from max_rate) and
+    # pauses the host for an exponential backoff, and every success adds
+    # increase back. a limiter that started unpaced stops pacing again once
+    # it is back at max_rate
+    def __init__(
+        self,
+        rate: float = None,
+        *,
+        min_rate: float = 0.2,
+        max_rate: float = 50,
+        burst: int = 4,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        backoff: float = 1,
+        max_backoff: float = 60,
+    ):
+        self.rate = rate
+        self.paced = rate is not None
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.next_at = 0.0
+        self.paused_until = 0.0
+        self.last_cut = 0.0
+        self.streak = 0
+        self.waiters: list[tuple[Priority, int, asyncio.Future[float]]] = []
+        self.counter = itertools.count()
+        self.timer: asyncio.TimerHandle = None
+        self.stats = RateLimitStats()
+
+    async def acquire(self, lane: Priority = Priority.INTERACTIVE) -> float:
+        # waits for the next slot and returns the send time. waiting requests
+        # get slots in lane order, so reads aren't stuck behind a crawl
+        now = time.monotonic()
+        self.stats.requests += 1
+        if self.rate is None:
+            return now
+        if lane == Priority.CRITICAL:
+            # writes don't queue behind paced reads, they only wait out a
+            # backoff pause; the slot they take delays the next read instead
+            self.next_at = max(self.next_at, self.earliest(now)) + 1 / self.rate
+            start = self.paused_until
+            if start > now:
+                self.stats.waited += start - now
+                await asyncio.sleep(start - now)
+            return max(start, now)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (lane, next(self.counter), future))
+        self.dispatch()
+        if not future.done():
+            try:
+                await future
+            finally:
+                self.stats.waited += time.monotonic() - now
+        return future.result()
+
+    def earliest(self, now: float) -> float:
+        return now - (self.burst - 1) / self.rate
+
+    def dispatch(self):
+        # hands out every slot that is due, highest lane first, and sets a
+        # timer for the next one
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        now = time.monotonic()
+        while self.waiters:
+            _, _, future = self.waiters[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self.waiters)
+                continue
+            if self.rate is not None:
+                slot = max(self.next_at, self.earliest(now))
+                if slot > now:
+                    self.timer = asyncio.get_running_loop().call_later(
+                        slot - now, self.dispatch
+                    )
+                    break
+                self.next_at = slot + 1 / self.rate
+            heapq.heappop(self.waiters)
+            future.set_result(now)
+
+    def succeeded(self):
+        self.streak = 0
+        if self.rate is None:
+            return
+        self.rate = min(self.max_rate, self.rate + self.increase)
+        if self.rate >= self.max_rate and not self.paced:
+            self.rate = None  # recovered, stop pacing
+            self.dispatch()
+
+    def refused(self, sent_at: float):
+        self.stats.refusals += 1
+        if sent_at < self.last_cut:
+            return
+        now = self.last_cut = time.monotonic()
+        self.stats.cuts += 1
+        self.rate = max(self.min_rate, (self.rate or self.max_rate) * self.decrease)
+        pause = min(self.max_backoff, self.backoff * 2**self.streak)
+        self.streak += 1
+        self.paused_until = now + pause
+        self.next_at = max(self.next_at, self.paused_until)
+
+
+class RateLimits:
+    # one limiter per host, shared by every module of a client
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.limiters: dict[str, RateLimiter] = {}
+
+    def __getitem__(self, url) -> RateLimiter:
+        host = URL(str(url)).host
+        if (limiter := self.limiters.get(host)) is None:
+            limiter = self.limiters[host] = RateLimiter(**self.kwargs)
+        return limiter
@@ -0,0 +1,107 @@
+from __future__ import annotations
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+
+
+class Priority(IntEnum):
+    CRITICAL = 0  # registration writes
+    INTERACTIVE = 1
+    BACKGROUND = 2  # crawls and prefetches
+
+
+# the lane of requests made by modules that don't pin one themselves
+PRIORITY: ContextVar[Priority] = ContextVar("priority", default=Priority.INTERACTIVE)
+# resolved by a request once it is through the scheduler and the rate limiter
+# and handed to the session, for code that starts a fetch in a task and has
+# to let it go out before blocking the loop
+DISPATCHED: ContextVar[asyncio.Future | None] = ContextVar("dispatched", default=None)
+
+
+@contextlib.contextmanager
+def priority(lane: Priority):
+    token = PRIORITY.set(lane)
+    try:
+        yield
+    finally:
+        PRIORITY.reset(token)
+
+
+@dataclass
+class LaneStats:
+    requests: int = 0
+    queued: int = 0
+    waited: float = 0
+
+
+class Scheduler:
+    # limits concurrent requests to `slots`, always dispatching the highest
+    # lane first; `reserved` slots can only be used by that lane and the ones
+    # above it, so writes find a free slot even when reads fill the rest
+    def __init__(
+        self,
+        slots: int = 16,
+        reserved: dict[Priority, int] = None,
+    ):
+        if reserved is None:
+            reserved = {Priority.CRITICAL: 4, Priority.INTERACTIVE: 4}
+        self.slots = slots
+        self.limits = {
+            lane: slots - sum(reserved.get(above, 0) for above in Priority if above < lane)
+            for lane in Priority
+        }
+        if min(self.limits.values()) < 1:
+            raise ValueError(f"{reserved} leaves no slots for some lanes")
+        self.active = 0
+        self.waiters: list[tuple[Priority, int, asyncio.Future]] = []
+        self.counter = itertools.count()
+        self.stats = {lane: LaneStats() for lane in Priority}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, lane: Priority):
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, lane: Priority):
+        stats = self.stats[lane]
+        stats.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (lane, next(self.counter), future))
+        self.dispatch()
+        if future.done():
+            return
+        stats.queued += 1
+        queued_at = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # got a slot just as we were cancelled
+            raise
+        finally:
+            stats.waited += time.monotonic() - queued_at
+
+    def release(self):
+        self.active -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        while self.waiters:
+            lane, _, future = self.waiters[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self.waiters)
+                continue
+            # lower lanes have lower limits, so they can't run either
+            if self.active >= self.limits[lane]:
+                break
+            heapq.heappop(self.waiters)
+            self.active += 1
+            future.set_result(None)
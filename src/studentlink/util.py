@@ -1,8 +1,10 @@
 import unicodedata
 from enum import IntEnum
+from typing import Callable, Hashable, TypeVar
 import re
-import time
-import asyncio
+import weakref
+
+T = TypeVar("T")
 
 class PageParseError(Exception):
     pass
@@ -42,37 +44,96 @@ class Semester(int):
         return Sem(self % 10)
 
 
+class InternTable:
+    # values are only held weakly, so the table never keeps anything alive; once
+    # maxsize live values are interned new ones are handed out unshared
+    def __init__(self, maxsize: int = 1 << 16):
+        self.maxsize = maxsize
+        self.table: weakref.WeakValueDictionary[Hashable, T] = (
+            weakref.WeakValueDictionary()
+        )
+
+    def get(self, key: Hashable, factory: Callable[..., T], *args, **kwargs) -> T:
+        try:
+            return self.table[key]
+        except KeyError:
+            pass
+        value = factory(*args, **kwargs)
+        if len(self.table) < self.maxsize:
+            self.table[key] = value
+        return value
+
+    def __len__(self):
+        return len(self.table)
+
+
+ABBR_PATTERN = re.compile(r"^([A-Z]{3}) ?([A-Z]{2}) ?(\d{3}[A-Z]?) ?([A-Z][A-Z\d])$")
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ALNUM = "0123456789" + LETTERS
+
+
 class Abbr(str):
+    # no per-instance __dict__; weak-referenceable for InternTable
+    __slots__ = ("__weakref__",)
+    interned = InternTable()
+
     def __new__(cls, text: str):
-        if not (
-            match := re.match(
-                r"^([A-Z]{3}) ?([A-Z]{2}) ?(\d{3}[A-Z]?) ?([A-Z][A-Z\d])$", text.upper()
-            )
-        ):
+        if type(text) is cls:
+            return text
+        if (self := cls.interned.table.get(text)) is not None:
+            return self
+        if not (match := ABBR_PATTERN.match(text.upper())):
             raise ValueError(f"Invalid abbreviation: {text}")
-        return super().__new__(cls, "{} {}{} {}".format(*match.groups()))
+        canonical = "{} {}{} {}".format(*match.groups())
+        return cls.interned.get(canonical, super().__new__, cls, canonical)
+
+    # the canonical form is fixed width apart from the course suffix, so the
+    # components are sliced out of it instead of being stored per instance
+    @property
+    def parts(self) -> tuple[str, str, str, str]:
+        return self[:3], self[4:6], self[6:-3], self[-2:]
+
+    @property
+    def key(self) -> int:
+        return self._make_key(*self.parts)
+
+    @staticmethod
+    def _make_key(college: str, dept: str, course: str, section: str) -> int:
+        # packs the components into an int that sorts the same way as the str
+        key = 0
+        for c in college + dept:
+            key = key * 26 + LETTERS.index(c)
+        key = key * 1000 + int(course[:3])
+        key = key * 27 + (LETTERS.index(course[3]) + 1 if len(course) > 3 else 0)
+        key = key * 26 + LETTERS.index(section[0])
+        return key * 36 + ALNUM.index(section[1])
+
+    @classmethod
+    def from_key(cls, key: int):
+        key, section2 = divmod(key, 36)
+        key, section1 = divmod(key, 26)
+        key, suffix = divmod(key, 27)
+        key, course = divmod(key, 1000)
+        letters = ""
+        for _ in range(5):
+            key, c = divmod(key, 26)
+            letters = LETTERS[c] + letters
+        return cls(
+            "{} {}{:03d}{} {}{}".format(
+                letters[:3],
+                letters[3:],
+                course,
+                LETTERS[suffix - 1] if suffix else "",
+                LETTERS[section1],
+                ALNUM[section2],
+            )
+        )
 
     def __iter__(self):
-        yield from re.match(
-            r"^([A-Z]{3}) ?([A-Z]{2}) ?(\d{3}[A-Z]?) ?([A-Z][A-Z\d])$", self
-        ).groups()
+        return iter(self.parts)
 
 
 def normalize(text: str) -> str:
     if not isinstance(text, str):
         return None
     return unicodedata.normalize("NFKD", text).strip()
-
-def async_ttl_cache(ttl_seconds: int, cache: dict = None):
-    def decorator(func):
-        _cache = {} if cache is None else cache
-        async def wrapper(*args, **kwargs):
-            key = (args, tuple(kwargs.items()))
-            if key in _cache and time.time() - _cache[key][1] < ttl_seconds:
-                result = _cache[key][0]
-            else:
-                result = asyncio.create_task(func(*args, **kwargs))
-                _cache[key] = (result, time.time())
-            return await result
-        return wrapper
-    return decorator
\ No newline at end of file
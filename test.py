@@ -20,13 +20,8 @@ USERNAME, PASSWORD = os.environ["USERNAME"], os.environ["PASSWORD"]
 
 
 async def main():
-    cookie_jar = aiohttp.CookieJar()
-    try:
-        cookie_jar.load("cookies.pickle")
-    except FileNotFoundError:
-        pass
     async with studentlink.StudentLinkAuth(
-        USERNAME, PASSWORD, session=aiohttp.ClientSession(cookie_jar=cookie_jar)
+        USERNAME, PASSWORD, cookie_path="cookies.pickle"
     ) as sl:
         semester = Semester.from_str("spring 2023")
         while True:
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from studentlink.cache import async_cache
+
+
+def make(**kwargs):
+    calls = []
+
+    @async_cache(kwargs.pop("ttl", 60), **kwargs)
+    async def double(x):
+        calls.append(x)
+        await asyncio.sleep(0)
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    return double, calls
+
+
+def test_concurrent_calls_share_one_call():
+    double, calls = make()
+
+    async def run():
+        return await asyncio.gather(*(double(1) for _ in range(5)))
+
+    assert asyncio.run(run()) == [2] * 5
+    assert calls == [1]
+    assert double.cache_info().hits == 4
+
+
+def test_entries_expire_after_ttl():
+    double, calls = make(ttl=0.05)
+
+    async def run():
+        await double(1)
+        await double(1)
+        await asyncio.sleep(0.06)
+        await double(1)
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+    assert double.cache_info().expirations == 1
+
+
+def test_least_recently_used_is_evicted():
+    double, calls = make(maxsize=2)
+
+    async def run():
+        await double(1)
+        await double(2)
+        await double(1)  # 2 is now the least recently used
+        await double(3)
+        await double(1)
+        await double(2)
+
+    asyncio.run(run())
+    assert calls == [1, 2, 3, 2]
+    info = double.cache_info()
+    assert (info.evictions, info.currsize) == (2, 2)
+
+
+def test_errors_are_not_cached_by_default():
+    double, calls = make()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await double(-1)
+
+    asyncio.run(run())
+    assert calls == [-1, -1]
+
+
+def test_errors_are_cached_for_error_ttl_only():
+    double, calls = make(ttl=60, error_ttl=0.05)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await double(-1)
+        await asyncio.sleep(0.06)
+        with pytest.raises(ValueError):
+            await double(-1)
+
+    asyncio.run(run())
+    assert calls == [-1, -1]
+    assert double.cache_info().errors == 2
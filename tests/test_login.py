@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from studentlink import StudentLinkAuth
+from studentlink.fake import FakeServer, LocalSession
+from studentlink.modules.browse_schedule import BrowseSchedule
+from studentlink.modules.reg import Add
+from studentlink.util import Semester
+
+SEMESTER = Semester.from_str("spring 2024")
+
+
+async def log_in_twice(server: FakeServer, forget: bool = False):
+    # logs in, drops studentlink's sessions and logs in again with the same
+    # cookie jar, which still holds duo's remembered device unless forget
+    async with server, LocalSession(server.url) as session:
+        async with StudentLinkAuth(
+            "user", "password", session=session, keepalive_interval=0
+        ) as sl:
+            assert await sl.module(Add).check_reg_open(SEMESTER)
+            assert (server.stats.logins, server.stats.pushes) == (1, 1)
+            server.sessions.clear()
+            if forget:
+                server.remembered.clear()
+            assert await sl.module(Add).check_reg_open(SEMESTER)
+            assert server.stats.logins == 2
+            return sl.login_stats
+
+
+@pytest.mark.parametrize("branch", ["redirect", "form"])
+def test_remembered_device_skips_push(branch):
+    server = FakeServer(
+        {"user": "password"}, sections=50, duo_remembers=True, remembered_branch=branch
+    )
+    stats = asyncio.run(log_in_twice(server))
+    assert server.stats.pushes == 1
+    assert server.stats.remembered == 1
+    assert (stats.logins, stats.remembered, stats.failures) == (2, 1, 0)
+
+
+def test_forgotten_device_sends_push():
+    server = FakeServer({"user": "password"}, sections=50, duo_remembers=True)
+    stats = asyncio.run(log_in_twice(server, forget=True))
+    assert server.stats.pushes == 2
+    assert server.stats.remembered == 0
+    assert (stats.logins, stats.remembered, stats.failures) == (2, 0, 0)
+
+
+def test_no_remembered_devices_sends_push():
+    server = FakeServer({"user": "password"}, sections=50)
+    stats = asyncio.run(log_in_twice(server))
+    assert server.stats.pushes == 2
+    assert (stats.logins, stats.remembered, stats.failures) == (2, 0, 0)
+
+
+def test_concurrent_requests_share_one_login():
+    async def run():
+        async with server, LocalSession(server.url) as session:
+            async with StudentLinkAuth(
+                "user", "password", session=session, keepalive_interval=0
+            ) as sl:
+                browse = sl.module(BrowseSchedule)
+                return sl.login_stats, await asyncio.gather(
+                    *(browse.search_class(SEMESTER, c) for c in ("CAS", "COM", "ENG"))
+                )
+
+    server = FakeServer({"user": "password"}, sections=50, latency=0.02)
+    stats, results = asyncio.run(run())
+    assert (server.stats.logins, server.stats.pushes) == (1, 1)
+    assert (stats.logins, stats.parked + stats.replayed) == (1, 2)
+    assert len(results[0]) == 50
@@ -0,0 +1,81 @@
+import asyncio
+import contextlib
+
+from studentlink import LoginError
+from studentlink.fake import FakeServer, LocalSession
+from studentlink.modules._module import Module
+from studentlink.modules.browse_schedule import BrowseSchedule
+from studentlink.pool import SessionPool
+from studentlink.util import Semester
+
+SEMESTER = Semester.from_str("spring 2024")
+
+
+class Listing(Module):
+    # yields which session it runs on, without touching the network
+    MODULE_NAME = "listing"
+    ACCOUNT_SPECIFIC = False
+
+    async def items(self, count: int):
+        if getattr(self.client, "broken", False):
+            raise LoginError("broken")
+        for i in range(count):
+            await asyncio.sleep(0)
+            yield self.client, i
+
+
+def test_async_generator_is_routed():
+    async def run():
+        async with SessionPool({"user": "password"}, 2, keepalive_interval=0) as pool:
+            first, second = pool.sessions["user"]
+            items = pool.module(Listing).items(3)
+            session, _ = await anext(items)
+            # held by the iteration, so the next one goes to the other session
+            assert pool.load[session] == 1
+            assert [s async for s, _ in pool.module(Listing).items(2)] == [
+                second if session is first else first
+            ] * 2
+            assert [i async for _, i in items] == [1, 2]
+            assert pool.load[session] == 0
+
+            # closing it early frees the session as well
+            async with contextlib.aclosing(pool.module(Listing).items(5)) as items:
+                async for _ in items:
+                    break
+            assert not +pool.load
+
+    asyncio.run(run())
+
+
+def test_async_generator_retries_on_a_fresh_session():
+    async def run():
+        async with SessionPool({"user": "password"}, 1, keepalive_interval=0) as pool:
+            broken = pool.sessions["user"][0]
+            broken.broken = True
+            assert [i async for _, i in pool.module(Listing).items(2)] == [0, 1]
+            assert pool.replaced == 1
+            assert pool.sessions["user"][0] is not broken
+
+    asyncio.run(run())
+
+
+def test_browse_schedule_iter_classes():
+    async def run():
+        async with FakeServer({"user": "password"}, sections=500, page_size=50) as server:
+            expected = [
+                s.abbr for s in server.catalog(SEMESTER).sections if s.abbr[:3] == "CAS"
+            ]
+            async with LocalSession(server.url) as session:
+                async with SessionPool(
+                    {"user": "password"}, 1, session=session, keepalive_interval=0
+                ) as pool:
+                    views = [
+                        view
+                        async for view in pool.module(BrowseSchedule).iter_classes(
+                            SEMESTER, "CAS"
+                        )
+                    ]
+        assert [view.abbr for view in views] == expected
+        assert len(expected) > 50
+
+    asyncio.run(run())
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from studentlink.ratelimit import RateLimiter
+from studentlink.scheduler import Priority
+
+
+def test_unpaced_until_refused():
+    async def run():
+        limiter = RateLimiter()
+        start = time.monotonic()
+        for _ in range(200):
+            await limiter.acquire()
+            limiter.succeeded()
+        assert time.monotonic() - start < 0.1
+        assert limiter.rate is None
+        assert limiter.stats.waited == 0
+
+    asyncio.run(run())
+
+
+def test_refusal_cuts_and_successes_recover():
+    limiter = RateLimiter(max_rate=50, decrease=0.5, increase=5, backoff=1)
+    limiter.refused(time.monotonic())
+    assert limiter.rate == 25
+    assert limiter.paused_until > time.monotonic() + 0.9
+    # refused before the cut, so it says nothing new about the rate
+    limiter.refused(0)
+    assert (limiter.rate, limiter.stats.refusals, limiter.stats.cuts) == (25, 2, 1)
+    for _ in range(4):
+        limiter.succeeded()
+    assert limiter.rate == 45
+    limiter.succeeded()
+    assert limiter.rate is None
+
+
+def test_explicit_rate_stays_paced():
+    limiter = RateLimiter(10, max_rate=10)
+    limiter.succeeded()
+    assert limiter.rate == 10
+
+
+def test_waiters_are_released_in_lane_order():
+    async def run():
+        limiter = RateLimiter(20, max_rate=20, burst=1)
+        order = []
+
+        async def acquire(lane):
+            await limiter.acquire(lane)
+            order.append(lane)
+
+        first = asyncio.create_task(acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.create_task(acquire(lane))
+            for lane in (Priority.BACKGROUND, Priority.BACKGROUND, Priority.INTERACTIVE)
+        ]
+        await asyncio.gather(first, *waiting)
+        return order
+
+    assert asyncio.run(run()) == [
+        Priority.BACKGROUND,
+        Priority.INTERACTIVE,
+        Priority.BACKGROUND,
+        Priority.BACKGROUND,
+    ]
+
+
+def test_critical_only_waits_out_a_pause():
+    async def run():
+        limiter = RateLimiter(1, max_rate=1, burst=1)
+        await limiter.acquire()
+        start = time.monotonic()
+        await limiter.acquire(Priority.CRITICAL)
+        assert time.monotonic() - start < 0.05
+        # a refusal pauses everyone, writes included
+        limiter.backoff = 0.1
+        limiter.refused(time.monotonic())
+        start = time.monotonic()
+        await limiter.acquire(Priority.CRITICAL)
+        assert time.monotonic() - start >= 0.09
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+
+from studentlink import StudentLinkAuth
+from studentlink.fake import FakeServer, LocalSession
+from studentlink.modules.reg import Add, ConfirmClasses, Drop, Plan, Section
+from studentlink.util import Semester
+
+SEMESTER = Semester.from_str("spring 2024")
+START = "reg/option/_start.pl"
+
+
+async def logged_in(server: FakeServer, session: LocalSession) -> StudentLinkAuth:
+    sl = StudentLinkAuth("user", "password", session=session, keepalive_interval=0)
+    await sl.__aenter__()
+    assert await sl.module(Add).check_reg_open(SEMESTER)
+    server.stats.requests.clear()
+    return sl
+
+
+def test_context_is_restored_once_after_a_relogin():
+    async def run():
+        async with FakeServer({"user": "password"}, sections=50) as server:
+            async with LocalSession(server.url) as session:
+                sl = await logged_in(server, session)
+                server.sessions.clear()
+                await asyncio.gather(
+                    sl.module(Drop).get_drop_list(SEMESTER),
+                    sl.module(Plan).get_planner(SEMESTER),
+                    sl.module(Section).get_section_change(SEMESTER),
+                    *(sl.module(Add).check_reg_open(SEMESTER) for _ in range(3)),
+                )
+                await sl.__aexit__(None, None, None)
+        assert server.stats.logins == 2
+        requests = server.stats.requests
+        assert requests[START] == 1
+        # each page once to find the login, once after it
+        for module in ("reg/drop/_start.pl", "reg/plan/_start.pl", "reg/section/_start.pl"):
+            assert requests[module] == 2, module
+
+    asyncio.run(run())
+
+
+def test_write_is_not_resent_after_a_login_elsewhere():
+    async def run():
+        async with FakeServer({"user": "password"}, sections=50, latency=0.1) as server:
+            section = server.catalog(SEMESTER).sections[0]
+            server.update_seats(section, 5)
+            async with LocalSession(server.url) as session:
+                sl = await logged_in(server, session)
+
+                async def login_elsewhere():
+                    await asyncio.sleep(0.02)
+                    sl.login_generation += 1
+
+                result, _ = await asyncio.gather(
+                    sl.module(ConfirmClasses).confirm_class(SEMESTER, section.reg_id),
+                    login_elsewhere(),
+                )
+                await sl.__aexit__(None, None, None)
+        assert server.stats.requests["reg/add/confirm_classes.pl"] == 1
+        assert server.stats.registrations == 1
+        assert result[section.abbr] == (True, "Class added")
+
+    asyncio.run(run())
@@ -0,0 +1,69 @@
+import asyncio
+
+from studentlink.scheduler import Priority, Scheduler
+
+
+async def hold(scheduler: Scheduler, lane: Priority, release: asyncio.Event, log: list):
+    async with scheduler.slot(lane):
+        log.append(lane)
+        await release.wait()
+
+
+def test_critical_gets_a_reserved_slot_while_background_holds_the_rest():
+    async def run():
+        scheduler = Scheduler(4, {Priority.CRITICAL: 1, Priority.INTERACTIVE: 1})
+        release, log = asyncio.Event(), []
+        background = [
+            asyncio.create_task(hold(scheduler, Priority.BACKGROUND, release, log))
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0)
+        # background may only use the slots nobody reserved
+        assert log == [Priority.BACKGROUND] * 2
+        critical = asyncio.create_task(
+            hold(scheduler, Priority.CRITICAL, release, log)
+        )
+        await asyncio.sleep(0)
+        assert log[-1] == Priority.CRITICAL
+        assert scheduler.stats[Priority.CRITICAL].queued == 0
+        release.set()
+        await asyncio.gather(critical, *background)
+        assert scheduler.active == 0
+
+    asyncio.run(run())
+
+
+def test_waiters_are_dispatched_in_lane_order():
+    async def run():
+        scheduler = Scheduler(1, {})
+        release, log = asyncio.Event(), []
+        first = asyncio.create_task(hold(scheduler, Priority.BACKGROUND, release, []))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.create_task(hold(scheduler, lane, release, log))
+            for lane in (Priority.BACKGROUND, Priority.INTERACTIVE, Priority.CRITICAL)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *waiting)
+        assert log == [Priority.CRITICAL, Priority.INTERACTIVE, Priority.BACKGROUND]
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def run():
+        scheduler = Scheduler(1, {})
+        release, log = asyncio.Event(), []
+        first = asyncio.create_task(hold(scheduler, Priority.BACKGROUND, release, []))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(hold(scheduler, Priority.CRITICAL, release, log))
+        later = asyncio.create_task(hold(scheduler, Priority.BACKGROUND, release, log))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(first, later)
+        assert log == [Priority.BACKGROUND]
+        assert scheduler.active == 0
+
+    asyncio.run(run())